@@ -0,0 +1,5 @@
+def search(pattern, identifiers=(), **options):
+    """Searches for the pattern like the grepdb command, yielding matches: see django_grepdb.api.search"""
+    # imported here, as the package is imported before the apps are ready
+    from .api import search
+    return search(pattern, identifiers, **options)
@@ -0,0 +1,159 @@
+from django.core.management import CommandError
+from django.db import DatabaseError
+from django.utils.encoding import force_text
+
+from .management.commands.grepdb import Command, get_model_label
+
+
+class SearchTimeout(Exception):
+    """Raised when a search with a deadline runs out of time, with the cursor to continue it from"""
+    def __init__(self, cursor):
+        super(SearchTimeout, self).__init__(u'The search ran out of time: continue it after {cursor}'.format(
+            cursor=cursor))
+        self.cursor = cursor
+
+
+class Match(object):
+    """A field of an object matching the pattern. Only what was fetched is stored: the spans of the matches in the
+    value, a snippet of it and which of the patterns match are worked out when they are asked for.
+    """
+    __slots__ = ('model', 'field', 'pk', 'instance', 'database', '_command', '_query_index')
+
+    def __init__(self, model, field, pk, instance, database, command, query_index):
+        self.model = model
+        self.field = field
+        self.pk = pk
+        # None when only primary keys were fetched
+        self.instance = instance
+        self.database = database
+        self._command = command
+        self._query_index = query_index
+
+    def __repr__(self):
+        return '<Match: {model}.{field} (pk={pk})>'.format(model=get_model_label(self.model), field=self.field,
+                                                           pk=self.pk)
+
+    @property
+    def cursor(self):
+        """A string to pass to search() as after, to continue the search from the next object. Matches are only
+        in primary key order within each model with stream=True.
+        """
+        return u'{index}:{pk}'.format(index=self._query_index, pk=self.pk)
+
+    @property
+    def value(self):
+        if self.instance is None:
+            return None
+        return getattr(self.instance, self.field)
+
+    @property
+    def spans(self):
+        """The (start, end) span of each match in the value"""
+        if self.value is None:
+            return []
+        return [match.span() for match in self._command.regex_all.finditer(force_text(self.value))]
+
+    @property
+    def patterns(self):
+        """Which of the patterns searched for match the value"""
+        if self.instance is None:
+            return []
+        return self._command.get_matching_patterns(self.instance, {'field_name': self.field})
+
+    def snippet(self, show_values='l'):
+        """Returns the part of the value around the matches, the same as the command shows for the show_values
+        style: 'l' for the lines containing them, 'a' for the whole value, or a number of characters either side
+        """
+        if self.value is None:
+            return u''
+        return self._command.get_snippet(force_text(self.value), show_values).strip('\n')
+
+
+def search(pattern, identifiers=(), after=None, allow_model=None, deadline=None, **options):
+    """Searches the models or fields given by the identifiers for the pattern, in the same way as the grepdb
+    command, and returns an iterator of a Match for each field of an object that matches. The command's options can
+    be given as keyword arguments, by their names in its options (e.g. ignore_case=True, field_type=['CharField'],
+    all_models=True or preset='templates'). The options are checked straight away, but the database is only
+    searched as the matches are iterated over. To continue a search, e.g. for the next page of results, pass the
+    cursor of the last match seen as after.
+
+    allow_model can be a function which is passed each model to be searched, and returns whether it should be, e.g.
+    to check a user's permissions. It can also raise an exception, which stops the whole search.
+
+    deadline can be a time.time() by which to stop. It's checked before each query, and while one runs, the
+    database is made to stop it at the deadline where it can be. SearchTimeout is then raised while iterating, with
+    the cursor to continue from, after the matches of the last object found. A query which takes longer than the time
+    given on its own is never finished.
+    """
+    command = Command()
+    args = ([] if pattern is None else [pattern]) + list(identifiers)
+    if options.get('preset'):
+        # so that the preset's defaults are set on the parser, as for the command
+        args.extend(['--preset', options.pop('preset')])
+    command.raw_args = args
+    parser = command.create_parser('', 'grepdb')
+    options = dict(vars(parser.parse_args(args)), **options)
+    if options['count'] or options['format'] != 'text':
+        raise CommandError(u"search() yields each match, so count and format can't be used with it")
+    options['no_color'] = True
+    command.check_preset(options)
+    identifiers = command.configure(options)
+    command.deadline = deadline
+    queries = command.get_queries(identifiers)
+    if allow_model is not None:
+        queries = [query for query in queries if allow_model(query['manager'].model)]
+    start = 0
+    if after is not None:
+        start, queries = get_queries_after(queries, after)
+    return iterate_matches(command, queries, start)
+
+
+def get_queries_after(queries, cursor):
+    """Returns the index of the query the cursor is in, and the queries from there on, starting after the
+    cursor's primary key, if it has one
+    """
+    try:
+        index, pk = cursor.split(u':', 1)
+        index = int(index)
+    except ValueError:
+        raise CommandError(u'Invalid cursor: {cursor}'.format(cursor=cursor))
+    queries = queries[index:]
+    if queries and pk:
+        queries[0] = dict(queries[0], after=pk)
+    return index, queries
+
+
+def iterate_matches(command, queries, start=0):
+    searches = command.search_queries(queries)
+    try:
+        for index, (query, results) in enumerate(searches, start):
+            # the cursor to continue from if the search runs out of time
+            cursor = u'{index}:{pk}'.format(index=index, pk=query.get('after', u''))
+            if command.deadline_passed():
+                raise SearchTimeout(cursor)
+            try:
+                for match in command.limit_results(get_query_matches(command, query, results, index)):
+                    cursor = match.cursor
+                    yield match
+            except DatabaseError:
+                # raised by the statement timeout
+                if command.deadline_passed():
+                    raise SearchTimeout(cursor)
+                raise
+    finally:
+        searches.close()
+
+
+def get_query_matches(command, query, results, query_index):
+    """Yields a Match for each result of the query, or for each field that matches with a single-scan query"""
+    model = query['manager'].model
+    database = command.get_connection(query).alias
+    field_names = command.get_searched_field_names(query)
+    for result in results:
+        for index, field_name in enumerate(field_names):
+            if command.pks_only:
+                # a single-scan query loads whether each field matches alongside the primary key
+                if 'field_names' not in query or result[index + 1]:
+                    yield Match(model, field_name, result[0], None, database, command, query_index)
+            elif 'field_names' not in query or command.field_matches(result, field_name):
+                yield Match(model, field_name, result.pk, result, database, command, query_index)
@@ -0,0 +1,108 @@
+import re
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import CharField, Lookup, TextField
+
+DEFAULT_SEARCH_CONFIG = 'english'
+
+
+class FullTextLookup(Lookup):
+    """Matches rows whose text contains all the words of the query, using PostgreSQL's full text search. Can use a
+    GIN index on to_tsvector(config, column) with the same search configuration.
+    """
+    lookup_name = 'grepdb_fulltext'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        config = get_search_config()
+        sql = 'to_tsvector(%s::regconfig, {lhs}) @@ plainto_tsquery(%s::regconfig, {rhs})'.format(lhs=lhs, rhs=rhs)
+        return sql, [config] + lhs_params + [config] + rhs_params
+
+
+class SimilarityLookup(Lookup):
+    """Matches rows whose text has a part similar to the query, using the pg_trgm extension's <% operator (word
+    similarity, pg_trgm 1.2 / PostgreSQL 9.6 or later). The % operator compares the query with the whole text, so
+    would find almost nothing in long text. Can use a GIN index on the column with gin_trgm_ops.
+    """
+    lookup_name = 'grepdb_similar'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        # the operator's % is doubled up for the database adapter's parameter substitution
+        return '{rhs} <%% {lhs}'.format(lhs=lhs, rhs=rhs), lhs_params + rhs_params
+
+
+def get_search_config():
+    return getattr(settings, 'DJANGO_GREPDB_SEARCH_CONFIG', DEFAULT_SEARCH_CONFIG)
+
+
+class RegexBackend(object):
+    """Matches the pattern as a regular expression with the database's regex lookups. Works on any database, and
+    on PostgreSQL can use GIN indexes with gin_trgm_ops (see the grepdb_pg_indexes command).
+    """
+    name = 'regex'
+    vendors = None
+    uses_regex = True
+
+    def get_lookup(self, ignore_case):
+        return 'iregex' if ignore_case else 'regex'
+
+    def get_highlight_pattern(self, pattern):
+        return pattern
+
+    def ignores_case(self, ignore_case):
+        return ignore_case
+
+
+class WordsBackend(RegexBackend):
+    """Base for backends which treat the pattern as a set of words, which are highlighted wherever they start a
+    word, ignoring case
+    """
+    uses_regex = False
+
+    def get_highlight_pattern(self, pattern):
+        words = re.findall(r'\w+', pattern, re.UNICODE)
+        if not words:
+            return re.escape(pattern)
+        return r'\b(?:{words})\w*'.format(words='|'.join(re.escape(word) for word in words))
+
+    def ignores_case(self, ignore_case):
+        return True
+
+
+class FullTextBackend(WordsBackend):
+    """Matches rows containing all the words in the pattern with PostgreSQL's full text search, which also matches
+    other forms of the words (e.g. "templates" for "template") according to DJANGO_GREPDB_SEARCH_CONFIG
+    """
+    name = 'fulltext'
+    vendors = ('postgresql',)
+
+    def get_lookup(self, ignore_case):
+        register_lookup(FullTextLookup)
+        return FullTextLookup.lookup_name
+
+
+class SimilarityBackend(WordsBackend):
+    """Matches rows which have a part similar to the pattern according to PostgreSQL's pg_trgm extension"""
+    name = 'similarity'
+    vendors = ('postgresql',)
+
+    def get_lookup(self, ignore_case):
+        register_lookup(SimilarityLookup)
+        return SimilarityLookup.lookup_name
+
+
+BACKENDS = OrderedDict((backend.name, backend) for backend in (RegexBackend, FullTextBackend, SimilarityBackend))
+
+
+def get_backend(name):
+    return BACKENDS[name]()
+
+
+def register_lookup(lookup):
+    for field_class in (CharField, TextField):
+        if lookup.lookup_name not in field_class.class_lookups:
+            field_class.register_lookup(lookup)
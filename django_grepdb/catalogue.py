@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+
+import django
+from django.apps import apps
+from django.conf import settings
+
+from .identifiers import get_field_names_for_model
+from .state import save_json
+
+# apps whose models are never searched with --all-models: the trigram index (django_grepdb.index)
+EXCLUDED_APP_LABELS = ('grepdb_index',)
+
+
+def get_catalogue_file():
+    """Returns the path of the file to cache the catalogue in, or None if it shouldn't be cached, as it isn't by
+    default: the current directory may not be writable, e.g. in a deployed container
+    """
+    return getattr(settings, 'DJANGO_GREPDB_CATALOGUE_FILE', None)
+
+
+def get_catalogue(field_types, app_labels=None, exclude_app_labels=None):
+    """Returns a list of each model with the names of its fields of the given types, for every installed model with
+    any, optionally only in or excluding some apps. The full list is built once and cached on disk until the models
+    may have changed.
+    """
+    labels = get_cached_catalogue(field_types)
+    catalogue = []
+    for label, field_names in labels:
+        app_label, model_name = label.split('.')
+        if app_labels and app_label not in app_labels or exclude_app_labels and app_label in exclude_app_labels:
+            continue
+        catalogue.append((apps.get_model(app_label, model_name), field_names))
+    return catalogue
+
+
+def get_cached_catalogue(field_types):
+    catalogue_file = get_catalogue_file()
+    if not catalogue_file:
+        return build_catalogue(field_types)
+    key = get_catalogue_key()
+    field_types_key = u','.join(sorted(field_types))
+    try:
+        with open(catalogue_file) as f:
+            cache = json.load(f)
+    except (IOError, ValueError):
+        cache = {}
+    if cache.get('key') != key:
+        cache = {'key': key, 'catalogues': {}}
+    if field_types_key not in cache['catalogues']:
+        cache['catalogues'][field_types_key] = build_catalogue(field_types)
+        try:
+            save_json(catalogue_file, cache)
+        except (IOError, OSError):
+            # carries on without the cache, e.g. if the file's directory isn't writable
+            pass
+    return cache['catalogues'][field_types_key]
+
+
+def build_catalogue(field_types):
+    """Returns a list of the label of each concrete model with fields of the given types, with their names. The
+    models of grepdb's own trigram index are left out, as its postings are usually the biggest table there is.
+    """
+    catalogue = []
+    for model in apps.get_models():
+        if model._meta.proxy or model._meta.app_label in EXCLUDED_APP_LABELS:
+            continue
+        field_names = get_field_names_for_model(model, field_types)
+        if field_names:
+            catalogue.append((u'{app_label}.{model_name}'.format(
+                app_label=model._meta.app_label, model_name=model._meta.object_name), field_names))
+    return catalogue
+
+
+def get_catalogue_key():
+    """Returns a hash of what the models depend on: the installed apps, and the migrations on disk of each of them
+    (checked rather than imported, so that it stays cheap). Apps whose migrations are elsewhere in MIGRATION_MODULES
+    are covered by the setting itself changing.
+    """
+    state = [django.get_version(), list(settings.INSTALLED_APPS),
+             sorted(getattr(settings, 'MIGRATION_MODULES', {}).items()), list(EXCLUDED_APP_LABELS)]
+    for app_config in apps.get_app_configs():
+        state.append([app_config.label, get_migration_files(os.path.join(app_config.path, 'migrations'))])
+    return hashlib.sha1(json.dumps(state).encode('utf-8')).hexdigest()
+
+
+def get_migration_files(migrations_path):
+    """Returns the name, modification time and size of each migration file in the directory, so that adding or
+    editing one changes the key
+    """
+    migrations = []
+    try:
+        for name in sorted(name for name in os.listdir(migrations_path) if name.endswith('.py')):
+            stat = os.stat(os.path.join(migrations_path, name))
+            migrations.append([name, stat.st_mtime, stat.st_size])
+    except OSError:
+        # e.g. an app without migrations
+        pass
+    return migrations
@@ -0,0 +1,85 @@
+import re
+from collections import deque
+from itertools import islice
+
+from django.utils import six
+
+# the most primary keys to load matches for in one query (SQLite allows fewer than 1000 parameters by default)
+LOAD_BATCH_SIZE = 500
+
+_regexes = {}
+
+
+def match_rows(pattern, flags, rows):
+    """Matches rows of a primary key followed by field values against the pattern with Python's re module. Returns
+    the primary key of each row where any of the fields match, along with whether each of them does.
+
+    Runs in the worker processes of the python engine, so only takes picklable arguments, and keeps the compiled
+    pattern between calls.
+    """
+    try:
+        regex = _regexes[pattern, flags]
+    except KeyError:
+        regex = _regexes[pattern, flags] = re.compile(pattern, flags)
+    matches = []
+    for row in rows:
+        fields_match = [value is not None and regex.search(to_text(value)) is not None for value in row[1:]]
+        if any(fields_match):
+            matches.append((row[0], fields_match))
+    return matches
+
+
+def to_text(value):
+    """Returns the value as text to match against, as values of fields searched with -f, e.g. integer or date
+    fields, aren't always text
+    """
+    if isinstance(value, six.string_types):
+        return value
+    return six.text_type(value)
+
+
+def get_chunks(iterable, size):
+    """Yields lists of up to size items from the iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def match_chunks(pattern, flags, chunks, pool=None, pending_limit=1):
+    """Yields the matches in each chunk of rows, in order. With a pool, chunks are matched in its processes, with
+    up to pending_limit chunks sent to it at once, so that rows are still only read from the database as they are
+    needed (Pool.imap would read them all in a thread of its own).
+    """
+    if pool is None:
+        for chunk in chunks:
+            for match in match_rows(pattern, flags, chunk):
+                yield match
+        return
+    pending = deque()
+    for chunk in chunks:
+        pending.append(pool.apply_async(match_rows, (pattern, flags, chunk)))
+        if len(pending) >= pending_limit:
+            for match in pending.popleft().get():
+                yield match
+    while pending:
+        for match in pending.popleft().get():
+            yield match
+
+
+def load_matches(results, pks):
+    """Yields the objects with the given primary keys from the queryset, loading a batch of them at a time"""
+    for batch in get_chunks(pks, LOAD_BATCH_SIZE):
+        for result in results.filter(pk__in=batch).order_by('pk'):
+            yield result
+
+
+def count_matches(field_names, matches):
+    """Returns pairs of each field name and the number of matches in it"""
+    counts = [0] * len(field_names)
+    for pk, fields_match in matches:
+        for index, field_matches in enumerate(fields_match):
+            counts[index] += field_matches
+    return six.moves.zip(field_names, counts)
@@ -0,0 +1,60 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import six
+from django.utils.encoding import force_bytes, force_text
+
+FIELDS = ['model', 'field', 'pk', 'database', 'admin_urls', 'spans', 'snippet', 'patterns']
+
+
+class JSONLinesWriter(object):
+    """Writes each match as a JSON object on its own line"""
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write_header(self):
+        pass
+
+    def write(self, record):
+        self.stream.write(json.dumps(record, cls=DjangoJSONEncoder, sort_keys=True))
+
+
+class DelimitedWriter(object):
+    """Writes each match as a row of delimiter separated values, after a header row with the column names. Lists
+    of values are written space separated within their column, with spans written as start-end, except for
+    patterns, which are written one per line.
+    """
+    delimiter = ','
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write_header(self):
+        self.stream.write(self.format_row(FIELDS), ending='')
+
+    def write(self, record):
+        record = dict(record, admin_urls=' '.join(record['admin_urls']),
+                      spans=' '.join(u'{0}-{1}'.format(*span) for span in record['spans']),
+                      patterns=u'\n'.join(force_text(pattern) for pattern in record['patterns']))
+        self.stream.write(self.format_row([record[field] for field in FIELDS]), ending='')
+
+    def format_row(self, values):
+        buffer = six.StringIO()
+        writer = csv.writer(buffer, delimiter=self.delimiter, lineterminator='\n')
+        if six.PY2:
+            # the Python 2 csv module only handles byte strings
+            values = [force_bytes(value) for value in values]
+        writer.writerow(values)
+        return force_text(buffer.getvalue())
+
+
+class TabDelimitedWriter(DelimitedWriter):
+    delimiter = '\t'
+
+
+WRITERS = {
+    'jsonl': JSONLinesWriter,
+    'csv': DelimitedWriter,
+    'tsv': TabDelimitedWriter,
+}
@@ -0,0 +1,40 @@
+from django.apps import apps
+from django.conf import settings
+
+
+def parse_identifier(identifier, field_types):
+    """Returns the model and field names given by an identifier of the form app_label.Model[.field_name...]. If no
+    fields are named, they are all the fields of the model of the given types (or subclasses of them).
+    """
+    parts = identifier.split('.')
+    app_label, model_name = parts[:2]
+    field_names = parts[2:]
+    model = apps.get_model(app_label, model_name)
+    if not field_names:
+        field_names = get_field_names_for_model(model, field_types)
+    return (model, field_names)
+
+
+def get_field_names_for_model(model, field_types):
+    return [field.name for field in model._meta.fields if field.get_internal_type() in field_types]
+
+
+def get_preset_fields(preset_names=None):
+    """Returns a dict of the set of field names searched by the presets in DJANGO_GREPDB_PRESETS for each
+    (concrete) model, either for all of them or just those named. Presets which are misconfigured are skipped.
+    """
+    presets = getattr(settings, 'DJANGO_GREPDB_PRESETS', {})
+    if not hasattr(presets, 'items'):
+        return {}
+    fields = {}
+    for preset_name, preset in presets.items():
+        if preset_names is not None and preset_name not in preset_names or not hasattr(preset, 'get'):
+            continue
+        field_types = preset.get('field_type') or ['TextField']
+        for identifier in preset.get('identifiers', []):
+            try:
+                model, field_names = parse_identifier(identifier, field_types)
+            except (LookupError, ValueError):
+                continue
+            fields.setdefault(model._meta.concrete_model, set()).update(field_names)
+    return fields
@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+
+
+class IndexConfig(AppConfig):
+    name = 'django_grepdb.index'
+    label = 'grepdb_index'
+    verbose_name = 'grepdb index'
+
+    def ready(self):
+        from . import receivers
+        # indexed models are only known from settings, so every save and delete is checked
+        post_save.connect(receivers.update_index, dispatch_uid='django_grepdb.index.update_index')
+        post_delete.connect(receivers.remove_from_index, dispatch_uid='django_grepdb.index.remove_from_index')
+        setting_changed.connect(receivers.clear_indexed_fields, dispatch_uid='django_grepdb.index.clear_indexed_fields')
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...utils import build_index, get_indexed_fields
+
+
+class Command(BaseCommand):
+    help = 'Builds the trigram index used to narrow down grepdb searches of the fields named in DJANGO_GREPDB_PRESETS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('identifiers', nargs='*', type=str,
+                            help='Only (re)build the index for these models or fields, which must be in a preset')
+
+    def handle(self, **options):
+        indexed_fields = get_indexed_fields()
+        if not indexed_fields:
+            raise CommandError(u'No fields to index: DJANGO_GREPDB_PRESETS is not configured in settings')
+        for model, field_names in self.get_fields(indexed_fields, options['identifiers']):
+            for field_name in sorted(field_names):
+                rows = build_index(model, field_name)
+                self.stdout.write(u'{app_label}.{model_name} {field_name}: {rows} rows indexed'.format(
+                    app_label=model._meta.app_label, model_name=model._meta.model_name, field_name=field_name,
+                    rows=rows))
+
+    def get_fields(self, indexed_fields, identifiers):
+        models = sorted(indexed_fields.items(), key=lambda item: (item[0]._meta.app_label, item[0]._meta.model_name))
+        if not identifiers:
+            return models
+        models_by_label = {(model._meta.app_label, model._meta.model_name): (model, field_names)
+                           for model, field_names in models}
+        fields = []
+        for identifier in identifiers:
+            parts = identifier.split('.')
+            model, field_names = models_by_label.get((parts[0], parts[1].lower()), (None, set()))
+            requested_field_names = set(parts[2:]) or field_names
+            if model is None or not requested_field_names <= field_names:
+                raise CommandError(u'{identifier} is not in DJANGO_GREPDB_PRESETS'.format(identifier=identifier))
+            fields.append((model, requested_field_names))
+        return fields
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexedField',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('field_name', models.CharField(max_length=255)),
+                ('complete', models.BooleanField(default=False)),
+                ('content_type', models.ForeignKey(to='contenttypes.ContentType')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Trigram',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('object_pk', models.CharField(max_length=255)),
+                ('trigram', models.CharField(max_length=3)),
+                ('field', models.ForeignKey(related_name='trigrams', to='grepdb_index.IndexedField')),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='trigram',
+            index_together=set([('field', 'object_pk'), ('field', 'trigram')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='indexedfield',
+            unique_together=set([('content_type', 'field_name')]),
+        ),
+    ]
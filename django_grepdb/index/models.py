@@ -0,0 +1,22 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+
+class IndexedField(models.Model):
+    """A field of a model which has been indexed. Only fields which are complete are used to narrow searches."""
+    content_type = models.ForeignKey(ContentType)
+    field_name = models.CharField(max_length=255)
+    complete = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ('content_type', 'field_name')
+
+
+class Trigram(models.Model):
+    """A posting of a (lower case) trigram found in the indexed field of an object"""
+    field = models.ForeignKey(IndexedField, related_name='trigrams')
+    object_pk = models.CharField(max_length=255)
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        index_together = [('field', 'trigram'), ('field', 'object_pk')]
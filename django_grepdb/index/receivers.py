@@ -0,0 +1,33 @@
+from django.db import router
+
+from . import utils
+
+
+def is_indexed_database(sender, using):
+    """Returns whether objects saved to or deleted from the database are those the index describes. Other
+    databases can have objects with the same primary keys, whose postings would replace the indexed ones.
+    """
+    return using == router.db_for_write(sender)
+
+
+def update_index(sender, instance, raw=False, update_fields=None, using=None, **kwargs):
+    if raw or not is_indexed_database(sender, using):
+        return
+    field_names = utils.get_indexed_fields().get(sender._meta.concrete_model)
+    if update_fields is not None and field_names:
+        field_names = field_names & set(update_fields)
+    if field_names:
+        utils.index_object(instance, field_names)
+
+
+def remove_from_index(sender, instance, using=None, **kwargs):
+    if not is_indexed_database(sender, using):
+        return
+    field_names = utils.get_indexed_fields().get(sender._meta.concrete_model)
+    if field_names:
+        utils.unindex_object(instance, field_names)
+
+
+def clear_indexed_fields(setting, **kwargs):
+    if setting == 'DJANGO_GREPDB_PRESETS':
+        utils._indexed_fields = None
@@ -0,0 +1,95 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count
+from django.utils.encoding import force_text
+
+from ..identifiers import get_preset_fields
+from .models import IndexedField, Trigram
+
+# past this many candidates, the index isn't selective enough to be worth using, and the list of primary keys
+# would be too long to pass to the search query (SQLite allows fewer than 1000 parameters by default)
+MAX_CANDIDATES = 900
+# patterns requiring fewer distinct trigrams than this (e.g. only a three character literal) would match too many
+# rows for the index to narrow them down, so it isn't queried for them
+MIN_TRIGRAMS = 2
+BATCH_SIZE = 500
+
+_indexed_fields = None
+
+
+def get_trigrams(text):
+    text = force_text(text).lower()
+    return set(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def get_indexed_fields():
+    """Returns a dict of the names of the fields to index for each model: those searched by DJANGO_GREPDB_PRESETS"""
+    global _indexed_fields
+    if _indexed_fields is None:
+        _indexed_fields = get_preset_fields()
+    return _indexed_fields
+
+
+def get_candidate_pks(model, field_names, literals):
+    """Returns the primary keys of the objects which could match a pattern requiring the literals in any of the
+    fields, or None if the index can't be used to narrow them down.
+    """
+    model = model._meta.concrete_model
+    if not set(field_names) <= get_indexed_fields().get(model, set()):
+        return None
+    trigrams = set()
+    for literal in literals:
+        trigrams.update(get_trigrams(literal))
+    if len(trigrams) < MIN_TRIGRAMS:
+        return None
+    indexed_fields = IndexedField.objects.filter(content_type=ContentType.objects.get_for_model(model),
+                                                 field_name__in=field_names, complete=True)
+    indexed_fields = list(indexed_fields.values_list('pk', flat=True))
+    if len(indexed_fields) < len(set(field_names)):
+        return None
+    postings = Trigram.objects.filter(field__in=indexed_fields, trigram__in=trigrams)
+    # objects with a posting for every trigram in at least one of the fields
+    postings = postings.values('field', 'object_pk').annotate(trigrams=Count('trigram', distinct=True))
+    postings = postings.filter(trigrams=len(trigrams))
+    candidates = set(postings.values_list('object_pk', flat=True)[:MAX_CANDIDATES * len(indexed_fields) + 1])
+    if len(candidates) > MAX_CANDIDATES:
+        return None
+    return [model._meta.pk.to_python(pk) for pk in candidates]
+
+
+def build_index(model, field_name):
+    """(Re)builds the index of one field of a model. Returns the number of objects indexed."""
+    content_type = ContentType.objects.get_for_model(model)
+    indexed_field, created = IndexedField.objects.get_or_create(content_type=content_type, field_name=field_name)
+    if not created:
+        IndexedField.objects.filter(pk=indexed_field.pk).update(complete=False)
+        indexed_field.trigrams.all().delete()
+    rows = 0
+    postings = []
+    for pk, value in model._default_manager.values_list('pk', field_name).iterator():
+        rows += 1
+        if value is not None:
+            postings.extend(Trigram(field=indexed_field, object_pk=force_text(pk), trigram=trigram)
+                            for trigram in get_trigrams(value))
+        if len(postings) >= BATCH_SIZE:
+            Trigram.objects.bulk_create(postings, batch_size=BATCH_SIZE)
+            postings = []
+    Trigram.objects.bulk_create(postings, batch_size=BATCH_SIZE)
+    IndexedField.objects.filter(pk=indexed_field.pk).update(complete=True)
+    return rows
+
+
+def index_object(instance, field_names):
+    content_type = ContentType.objects.get_for_model(instance)
+    object_pk = force_text(instance.pk)
+    for indexed_field in IndexedField.objects.filter(content_type=content_type, field_name__in=field_names):
+        indexed_field.trigrams.filter(object_pk=object_pk).delete()
+        value = getattr(instance, indexed_field.field_name)
+        if value is not None:
+            Trigram.objects.bulk_create([Trigram(field=indexed_field, object_pk=object_pk, trigram=trigram)
+                                         for trigram in get_trigrams(value)], batch_size=BATCH_SIZE)
+
+
+def unindex_object(instance, field_names):
+    content_type = ContentType.objects.get_for_model(instance)
+    Trigram.objects.filter(field__content_type=content_type, field__field_name__in=field_names,
+                           object_pk=force_text(instance.pk)).delete()
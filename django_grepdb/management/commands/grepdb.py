@@ -1,13 +1,36 @@
 import argparse
+import hashlib
+import io
+import json
+import operator
 import re
+import time
+from collections import OrderedDict
+from functools import reduce
+from itertools import islice
 
-import colorama
 from django.apps import apps
 from django.conf import settings
-from django.contrib.contenttypes.models import ContentType
 from django.core.management.base import BaseCommand, CommandError
-from django.core.urlresolvers import reverse
-from termcolor import colored
+from django.db import DEFAULT_DB_ALIAS, connections, models, router
+from django.db.models import Q
+from django.utils import six
+from django.utils.encoding import force_text
+from django.utils.http import RFC3986_SUBDELIMS, urlquote
+
+from ...backends import BACKENDS, get_backend
+from ...catalogue import get_catalogue
+from ...engine import count_matches, get_chunks, load_matches, match_chunks
+from ...formats import WRITERS
+from ...identifiers import parse_identifier
+from ...patterns import (MAX_GROUPS, NON_CAPTURING_GROUP_VENDORS, count_groups, get_required_literals,
+                         has_backreferences)
+from ...related import get_str_relations
+from ...signals import query_finished, search_finished
+from ...sqlite import install_regexp
+from ...state import get_state_file, load_watermarks, save_watermarks
+from ...stats import PhaseTimes, cpu_time
+from ...timeouts import statement_timeout
 
 
 def show_values_style(arg):
@@ -21,12 +44,50 @@ def show_values_style(arg):
             values=', '.join(special_choices)))
 
 
+def positive_int(arg):
+    try:
+        value = int(arg)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError("{arg} is not a positive integer".format(arg=arg))
+    return value
+
+
+def uses_default_str(model):
+    """Whether the model has Django's default string representation, which doesn't use any of its fields"""
+    return (six.get_unbound_function(model.__str__) is six.get_unbound_function(models.Model.__str__) and
+            not hasattr(model, '__unicode__'))
+
+
+def get_model_label(model):
+    return u'{app_label}.{model_name}'.format(app_label=model._meta.app_label, model_name=model._meta.model_name)
+
+
+ADMIN_PK_PLACEHOLDER = 'GREPDB_PK'
+
+
 class Command(BaseCommand):
     help = 'Provides a grep-like command line interface for searching objects in the database'
 
     def add_arguments(self, parser):
-        parser.add_argument('pattern', type=str, help='Pattern to search for')
+        parser.add_argument('pattern', nargs='?', type=str,
+                            help='Pattern to search for. If patterns are given with -e or --patterns-file instead, '
+                            'this is the first identifier.')
         parser.add_argument('identifiers', nargs='*', type=str, help='Identifier of a model or field')
+        parser.add_argument('--all-models', action='store_true',
+                            help='Search every installed model with fields of the field types, instead of naming '
+                            'them as identifiers. If DJANGO_GREPDB_CATALOGUE_FILE is set, the list of models and '
+                            'fields is cached in it until the installed apps or their migrations change.')
+        parser.add_argument('--app', dest='app_labels', action='append',
+                            help='With --all-models, only search the models of this app. Can be used more than once.')
+        parser.add_argument('--exclude-app', dest='exclude_app_labels', action='append',
+                            help="With --all-models, don't search the models of this app. Can be used more than once.")
+        parser.add_argument('--regexp', '-e', dest='patterns', action='append', type=str,
+                            help='A pattern to search for. Can be used more than once to search for any of several '
+                            'patterns in one pass, showing which of them each match is for.')
+        parser.add_argument('--patterns-file',
+                            help='File of patterns to search for, one per line, as with -e. Empty lines are ignored.')
         parser.add_argument('--show-values', '-s', nargs='?', type=show_values_style, default='l',
                             help='Turn off showing matching values (default is any line containing a match), '
                             'or provide the mode "a" to show the entire field '
@@ -38,9 +99,91 @@ class Command(BaseCommand):
                             help='Search all CharField fields (and subclasses) on a model if no field is specified')
         parser.add_argument('--find-fields', '-f', dest='field_type', action='append', type=str,
                             help='Search all fields of this type (and subclasses) on a model if no field is specified')
+        parser.add_argument('--format', choices=['text'] + sorted(WRITERS), default='text',
+                            help='Output format. Instead of the default text, "jsonl", "csv" and "tsv" write one '
+                            'record per match (its model, field, primary key, database, admin URLs, the spans of '
+                            'the matches in the value, and a snippet of the value as chosen by --show-values) '
+                            'without colour, for processing by other tools.')
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument('--count', action='store_true',
+                          help='Only write the number of matching rows for each field, counted by the database')
+        mode.add_argument('--pks-only', action='store_true',
+                          help='Only write the primary keys of the matching rows, which are all that is loaded')
+        parser.add_argument('--max-count', '-m', type=positive_int,
+                            help='Stop after this many matching rows for each field (or for each model with '
+                            '--single-scan), which is applied as a LIMIT on each query')
+        parser.add_argument('--max-total', type=positive_int,
+                            help='Stop after this many matching rows in total. Each query is limited to the number '
+                            'still to be found, and any queries left are not run.')
+        parser.add_argument('--first', dest='max_total', action='store_const', const=1,
+                            help='Stop after the first match, the same as --max-total 1')
+        parser.add_argument('--single-scan', action='store_true',
+                            help='Search all fields of a model with a single query rather than one query per field. '
+                            'Matching fields are then worked out for each row using Python regular expressions.')
+        parser.add_argument('--stream', action='store_true',
+                            help='Fetch matches in chunks, in primary key order, writing each one out as soon as it is '
+                            'fetched rather than loading all of them first. Keeps memory use down on large tables.')
+        parser.add_argument('--chunk-size', type=positive_int, default=1000,
+                            help='Number of rows to fetch at a time in stream mode (default 1000)')
+        parser.add_argument('--no-str', action='store_true',
+                            help='Identify matches by model and primary key only, without calling __str__ on them. '
+                            'Only the primary key and searched fields then need to be loaded from the database.')
+        parser.add_argument('--select-related', dest='select_related', action='append', metavar='MODEL.RELATION',
+                            help='Load a relation which a model\'s __str__ follows along with each match, as '
+                            'app_label.Model.relation (with __ between the names of relations to follow further), '
+                            'instead of with a query for each. Can be used more than once.')
+        parser.add_argument('--prefetch-related', dest='prefetch_related', action='append',
+                            metavar='MODEL.RELATION',
+                            help='Prefetch a relation which a model\'s __str__ uses, e.g. to many objects, as '
+                            'app_label.Model.relation. Can be used more than once.')
+        parser.add_argument('--no-auto-related', dest='auto_related', action='store_false',
+                            help="Don't load the relations which each model's __str__ is found to follow by reading "
+                            "its source")
+        parser.add_argument('--no-prefilter', dest='prefilter', action='store_false',
+                            help="Don't narrow down the rows to match the regex against with substring lookups for "
+                            "literal text required by the pattern, in case the pattern isn't parsed the same way "
+                            "by the database")
+        parser.add_argument('--backend', choices=list(BACKENDS), default='regex',
+                            help='How to match the pattern: "regex" (the default) matches it as a regular expression '
+                            'on any database. On PostgreSQL, "fulltext" matches rows containing all its words with '
+                            'full text search, and "similarity" matches rows with a part similar to it with the pg_trgm '
+                            'extension\'s word similarity (PostgreSQL 9.6 or later).')
+        parser.add_argument('--engine', choices=['database', 'python'], default='database',
+                            help='Where to match the pattern. "database" (the default) uses its regex support. '
+                            '"python" only loads the searched fields (of rows containing any literal text that the '
+                            'pattern requires) in chunks, and matches them with Python\'s re module in a pool of '
+                            '--jobs processes, so that the pattern means the same on every database, and the '
+                            'highlighting always agrees with the matches.')
+        parser.add_argument('--jobs', '-j', type=positive_int,
+                            help='Number of queries to run at once, each in its own thread with its own database '
+                            'connection (default 1, or the number of databases searched). Output is still written '
+                            'in order, but the results of each query are loaded in full before being written.')
+        parser.add_argument('--database', dest='databases', action='append',
+                            help='Alias of a database to search instead of the one chosen by the database router, '
+                            'e.g. a read replica. Can be used more than once to search several databases.')
+        parser.add_argument('--all-databases', action='store_true',
+                            help='Search every database configured in settings.DATABASES, skipping the models which '
+                            'the database routers neither read from nor migrate to each one')
+        parser.add_argument('--stats', action='store_true',
+                            help='Write statistics to stderr: for each query, the number of rows returned, the wall '
+                            'and CPU time taken to fetch them, the length of the searched text loaded and the number '
+                            'of SQL queries run (and with --verbosity 2, the SQL itself), then the time spent in '
+                            'each phase of the search. They are written as JSON with --format jsonl, csv or tsv.')
+        parser.add_argument('--since', action='store_true',
+                            help='Only search rows added or changed since the last --since run of the same search '
+                            '(the same patterns, identifiers and options matching them, and preset), according to '
+                            'the watermark stored for each model in the file set as DJANGO_GREPDB_STATE_FILE')
+        parser.add_argument('--since-field', default='pk',
+                            help='Field whose highest value is stored as the watermark for --since, e.g. an '
+                            'auto_now updated_at field to find changed rows as well as new ones (default pk)')
         parser.add_argument('--preset', '-p', help='The name of a preset configuration in DJANGO_GREPDB_PRESETS. '
                             'DJANGO_GREPDB_PRESETS should be a dict of dicts, with each config dict providing '
                             'default values for any number of parser args.')
+        if apps.is_installed('django_grepdb.index'):
+            parser.add_argument('--use-index', action='store_true',
+                                help="Narrow down the rows to search with the trigram index. It isn't updated by "
+                                "QuerySet.update(), bulk_create() or raw SQL, so rebuild it after those, or rows they "
+                                "changed may be missed. Can be set in a preset.")
         if apps.is_installed('django.contrib.admin'):
             parser.add_argument('--admin-links', '-l', dest='admin_hostname', nargs='*', default=['default'],
                                 help='Generate admin links. Defaults to true, using http://localhost:8000/ as hostname. '
@@ -48,47 +191,440 @@ class Command(BaseCommand):
                                 'dict defined in settings, the value of the "default" key will be used as default, '
                                 'and keys from it can also be passed to use their values as hostnames. '
                                 'Links can be disabled by using this argument without any values.')
-        self.parser = parser
 
-    def handle(self, **options):
-        colorama.init()
-        preset = self.get_preset(options['preset'])
+    def create_parser(self, prog_name, subcommand):
+        """Returns the parser with the defaults from the preset in the raw arguments, if there is one, in place.
+        The raw arguments are parsed without them first, with the whole parser so that the preset is found however
+        the options are written (e.g. -ip preset), and to tell which arguments were given.
+        """
+        parser = super(Command, self).create_parser(prog_name, subcommand)
+        self.applied_preset = None
+        self.identifiers_given = True
+        raw_args = getattr(self, 'raw_args', None)
+        if raw_args is None:
+            return parser
+        try:
+            given = parser.parse_known_args(raw_args)[0]
+            preset = self.get_preset(given.preset)
+        except CommandError:
+            # raised again when the arguments are parsed, or from handle, where it can be reported
+            return parser
+        self.identifiers_given = bool(given.identifiers)
         if preset:
-            self.parser.set_defaults(**preset)
-            # re-parse the command line arguments with new defaults in place
-            try:
-                options = vars(self.parser.parse_args(self.raw_args))
-            except AttributeError:
-                if not self._called_from_command_line:
-                    # regular call_command doesn't store raw_args
-                    msg = '--preset mode is not compatible with django.core.management.call_command: you need to ' \
-                          'use django_grepdb.management.call_command instead'
-                    raise CommandError(msg)
-                else:
-                    # if it was called from the command line, the problem is something unknown
-                    raise
-        self.pattern = options['pattern']
-        self.ignore_case = options['ignore_case']
+            parser.set_defaults(**preset)
+            self.applied_preset = given.preset
+        return parser
+
+    def handle(self, **options):
+        self.check_preset(options)
+        identifiers = self.configure(options)
+        if self.collect_stats:
+            self.time_phases()
+        queries = self.get_queries(identifiers)
+        if self.writer:
+            self.writer.write_header()
+        for query, results in self.search_queries(queries):
+            self.write_query_results(query, results)
+
+    def configure(self, options):
+        """Sets up the search from the options, and returns the identifiers to search"""
+        self.patterns, identifiers = self.get_patterns_and_identifiers(options)
+        self.identifiers = identifiers
+        self.pattern = self.combine_patterns(self.patterns)
+        self.plain_group_pattern = self.combine_patterns(self.patterns, group=u'({pattern})')
+        self.format = options['format']
+        self.no_color = options.get('no_color', False) or self.format != 'text'
+        self.init_color()
+        self.writer = WRITERS[self.format](self.stdout) if self.format in WRITERS else None
+        self.count = options['count']
+        self.pks_only = options['pks_only']
+        self.max_count = options['max_count']
+        self.max_total = options['max_total']
+        self.total = 0
+        self.backend = get_backend(options['backend'])
+        self.ignore_case = self.backend.ignores_case(options['ignore_case'])
+        self.engine = options['engine']
+        self.process_pool = None
+        self.single_scan = options['single_scan']
+        self.stream = options['stream']
+        self.chunk_size = options['chunk_size']
+        self.no_str = options['no_str']
+        self.str_fields = self.get_str_fields()
+        self.select_related = self.get_related_options(options['select_related'], '--select-related')
+        self.prefetch_related = self.get_related_options(options['prefetch_related'], '--prefetch-related')
+        self.auto_related = options['auto_related']
+        self.related = {}
+        self.all_databases = options['all_databases']
+        self.databases = self.get_databases(options)
+        self.jobs = options['jobs'] or len(self.databases or [None])
+        self.stats = options['stats']
+        self.verbosity = options.get('verbosity', 1)
+        # statistics are also collected for any receivers of the signals
+        self.collect_stats = self.stats or query_finished.has_listeners(self.__class__) or \
+            search_finished.has_listeners(self.__class__)
+        self.since = options['since']
+        self.since_field = options['since_field']
+        self.preset_name = options['preset'] or ''
+        self.check_options()
+        self.compile_regexes()
+        self.prefilter = options['prefilter']
+        if self.backend.uses_regex:
+            self.literals, self.literal_pattern = get_required_literals(self.pattern)
+        else:
+            self.literals, self.literal_pattern = [], False
+        self.use_index = options.get('use_index', False)
         self.show_values = options.get('show_values', False)
         self.field_type = options['field_type'] or ['TextField']
+        self.all_models = options['all_models']
+        self.app_labels = options['app_labels']
+        self.exclude_app_labels = options['exclude_app_labels']
         self.admin_hostnames = self.get_admin_hostnames(options)
+        self.phase_times = PhaseTimes()
+        # a time.time() to stop searching at, which search() can set
+        self.deadline = None
+        return identifiers
 
-        identifiers = options['identifiers']
-        queries = self.get_queries(identifiers)
-        for query in queries:
-            results = self.search(query)
-            if results.exists():
-                self.stdout.write(colored(u'\n{model} {field}'.format(model=query['manager'].model, field=query['field_name']),
-                                          'cyan', attrs=['bold']))
-                for result in results:
-                    self.stdout.write(colored(u'{result} (pk={result.pk})'.format(result=result), 'green', attrs=['bold']))
-                    if self.admin_hostnames:
-                        self.stdout.write(self.get_admin_links(result))
-                    if self.show_values is not None:  # can't be a truthiness check, as zero is different from no show
-                        self.stdout.write(self.get_value(result, query))
+    def search_queries(self, queries):
+        """Yields each query with its results, then once they have been used, collects the query's statistics. The
+        watermarks of a --since search are only saved once every query has been searched.
+        """
+        if self.since:
+            self.set_since_bounds(queries)
+        try:
+            for query, results in self.run_queries(queries):
+                yield query, results
+                if self.collect_stats:
+                    self.finish_query_stats(query)
+        finally:
+            if self.process_pool is not None:
+                self.process_pool.terminate()
+        if self.collect_stats:
+            self.finish_stats(queries)
+        if self.since:
+            self.save_since_watermarks()
+
+    def get_patterns_and_identifiers(self, options):
+        """Returns the list of patterns to search for and the identifiers to search. The first positional argument
+        is the pattern, unless there are patterns from -e or --patterns-file.
+        """
+        patterns = list(options['patterns'] or [])
+        if options['patterns_file']:
+            patterns.extend(self.read_patterns_file(options['patterns_file']))
+        if patterns:
+            if options['pattern'] is None:
+                return patterns, options['identifiers']
+            identifiers = options['identifiers']
+            if self.applied_preset and not self.identifiers_given:
+                # only the first identifier was given on the command line, which replaces the preset's
+                identifiers = []
+            return patterns, [options['pattern']] + list(identifiers)
+        if options['pattern'] is None:
+            raise CommandError(u'No pattern given: pass one as the first argument, or use -e or --patterns-file')
+        return [options['pattern']], options['identifiers']
+
+    def read_patterns_file(self, path):
+        try:
+            with io.open(path, encoding='utf-8') as patterns_file:
+                return [line.rstrip(u'\r\n') for line in patterns_file if line.rstrip(u'\r\n')]
+        except IOError as e:
+            raise CommandError(u'Could not read patterns file {path}: {error}'.format(path=path, error=e.strerror))
+
+    def combine_patterns(self, patterns, group=u'(?:{pattern})'):
+        """Returns a single pattern matching any of the patterns, so that each table is only scanned once. Each
+        is put in a non-capturing group, or a plain one for databases whose regex dialects don't have them (see
+        get_database_pattern). As the groups of one pattern shift the numbers of those in the next, patterns with
+        backreferences can't be combined.
+        """
+        if len(patterns) == 1:
+            return patterns[0]
+        for pattern in patterns:
+            if has_backreferences(pattern):
+                raise CommandError(u'Pattern "{pattern}" refers back to a group, so it can\'t be combined with other '
+                                   u'patterns: search for it on its own'.format(pattern=force_text(pattern)))
+        return u'|'.join(group.format(pattern=force_text(pattern)) for pattern in patterns)
+
+    def get_database_pattern(self, vendor):
+        if vendor in NON_CAPTURING_GROUP_VENDORS:
+            return self.pattern
+        return self.plain_group_pattern
+
+    def check_options(self):
+        if len(self.patterns) > 1 and not self.backend.uses_regex:
+            raise CommandError(u'Multiple patterns can only be used with --backend regex')
+        if MAX_GROUPS is not None and self.backend.uses_regex:
+            groups = sum(count_groups(pattern) for pattern in self.patterns)
+            if groups > MAX_GROUPS:
+                raise CommandError(u'The patterns have {groups} groups between them, but Python can only match '
+                                   u'{max_groups} at once'.format(groups=groups, max_groups=MAX_GROUPS))
+        if self.writer and (self.count or self.pks_only):
+            raise CommandError(u'--count and --pks-only can only be used with --format text')
+        if self.engine == 'python' and not self.backend.uses_regex:
+            raise CommandError(u'--engine python can only be used with --backend regex')
+        if self.since and self.get_limit() is not None:
+            # rows past the limit would be left out of the next --since run
+            raise CommandError(u"--since can't be used with --max-count, --max-total or --first")
+        if self.since and not get_state_file():
+            raise CommandError(u'--since needs DJANGO_GREPDB_STATE_FILE to be set to the path of a file to store the '
+                               u'watermarks in')
+
+    def check_preset(self, options):
+        """Checks that the preset given, if any, exists and had its defaults set by create_parser"""
+        preset = self.get_preset(options['preset'])
+        if preset and self.applied_preset != options['preset']:
+            if getattr(self, 'raw_args', None) is None:
+                # regular call_command doesn't store raw_args
+                msg = '--preset mode is not compatible with django.core.management.call_command: you need to ' \
+                      'use django_grepdb.management.call_command instead'
+                raise CommandError(msg)
+            raise CommandError(u'Preset "{preset_name}" could not be found in the arguments'.format(
+                preset_name=options['preset']))
+
+    def init_color(self):
+        """Loads the colour libraries, only when the output is coloured"""
+        if self.no_color:
+            return
+        import colorama
+        from termcolor import colored
+        colorama.init()
+        self.termcolor_colored = colored
+
+    def write_query_results(self, query, results):
+        if self.count:
+            self.write_counts(query, results)
+        elif 'field_names' in query:
+            self.write_combined_results(query, results)
+        else:
+            self.write_results(query, results)
+
+    def run_queries(self, queries):
+        """Yields each query with its results, in order. With more than one job, the queries are run concurrently
+        by a pool of threads.
+        """
+        if self.jobs == 1 or self.engine == 'python':
+            # the python engine uses the jobs for processes to match in instead, which are started before any of
+            # the queries are run
+            if self.engine == 'python':
+                self.get_process_pool()
+            for query in queries:
+                if self.total_reached():
+                    return
+                yield query, self.get_results(query)
+            return
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(min(self.jobs, len(queries) or 1))
+        try:
+            for query, results in pool.imap(self.fetch_results, queries):
+                if self.total_reached():
+                    return
+                if self.collect_stats:
+                    results = self.iterate_counting_render_queries(query, results)
+                yield query, results
+        finally:
+            # stops any queries still to be run
+            pool.terminate()
+
+    def fetch_results(self, query):
+        """Loads all of the results of a query in a worker thread, which has its own database connection"""
+        try:
+            return query, list(self.get_results(query))
+        finally:
+            connections.close_all()
+
+    def write_results(self, query, results):
+        results = self.limit_results(results)
+        if self.writer:
+            for result in results:
+                self.writer.write(self.get_record(result, query))
+            return
+        header_written = False
+        for result in results:
+            # the header is only written once there is a first result, so no separate query is needed to check
+            if not header_written:
+                self.stdout.write(self.colored(self.get_header(query), 'cyan', attrs=['bold']))
+                header_written = True
+            if self.pks_only:
+                self.stdout.write(force_text(result[0]))
+                continue
+            self.stdout.write(self.colored(self.get_result_title(result, query), 'green', attrs=['bold']))
+            if len(self.patterns) > 1:
+                self.stdout.write(self.colored(u'Patterns: ' + u', '.join(self.get_matching_patterns(result, query)),
+                                               'magenta'))
+            if self.admin_hostnames:
+                self.stdout.write(self.get_admin_links(result, query))
+            if self.show_values is not None:  # can't be a truthiness check, as zero is different from no show
+                self.stdout.write(self.get_value(result, query))
+
+    def get_record(self, result, query):
+        text = getattr(result, query['field_name'])
+        return {
+            'model': get_model_label(query['manager'].model),
+            'field': query['field_name'],
+            'pk': result.pk,
+            'database': self.get_connection(query).alias,
+            'admin_urls': self.get_admin_urls(result, query) if self.admin_hostnames else [],
+            'spans': [match.span() for match in self.regex_all.finditer(text)],
+            'snippet': self.get_value(result, query).strip('\n') if self.show_values is not None else '',
+            'patterns': self.get_matching_patterns(result, query),
+        }
+
+    def get_matching_patterns(self, result, query):
+        """Returns which of the patterns match the field of the result"""
+        text = getattr(result, query['field_name'])
+        if len(self.patterns) == 1:
+            return self.patterns
+        return [pattern for pattern, regex in zip(self.patterns, self.pattern_regexes) if regex.search(text)]
+
+    def colored(self, text, *args, **kwargs):
+        if self.no_color:
+            return text
+        return self.termcolor_colored(text, *args, **kwargs)
+
+    def get_header(self, query):
+        header = u'\n{model} {field}'.format(model=query['manager'].model, field=query['field_name'])
+        if 'using' in query:
+            header += u' [{alias}]'.format(alias=query['using'])
+        return header
+
+    def limit_results(self, results):
+        """Yields results up to the limits, counting them towards the total. Results are limited by the queries
+        too, but the rows for each field of a single-scan query, or from queries which were run at the same time as
+        others, can still go over.
+        """
+        for result in islice(results, self.get_limit()):
+            self.total += 1
+            yield result
+
+    def get_limit(self):
+        """Returns the most results that the next query should return, or None if there is no limit"""
+        limits = [self.max_count]
+        if self.max_total is not None:
+            limits.append(self.max_total - self.total)
+        limits = [limit for limit in limits if limit is not None]
+        return min(limits) if limits else None
+
+    def total_reached(self):
+        return self.max_total is not None and self.total >= self.max_total
+
+    def deadline_passed(self):
+        return self.deadline is not None and time.time() > self.deadline
+
+    def time_phases(self):
+        """Wraps the methods for each phase of writing out the results, and the output stream, to time them. Only
+        done when statistics are collected, so that there's no overhead otherwise.
+        """
+        for phase, method_name in [('title', 'get_result_title'), ('highlight', 'get_value'),
+                                   ('links', 'get_admin_links')]:
+            setattr(self, method_name, self.phase_times.wrap(phase, getattr(self, method_name)))
+        self.stdout.write = self.phase_times.wrap('write', self.stdout.write)
+
+    def finish_query_stats(self, query):
+        self.phase_times.add('fetch', query['seconds'], query['cpu_seconds'])
+        if self.stats:
+            self.write_stats(query)
+        query_finished.send(sender=self.__class__, query=query, rows=query['rows'], seconds=query['seconds'],
+                            cpu_seconds=query['cpu_seconds'], text_length=query['text_length'], sql=query['sql'],
+                            render_queries=query['render_queries'])
+
+    def finish_stats(self, queries):
+        if self.stats:
+            if self.writer:
+                self.stderr.write(json.dumps({'phases': self.phase_times.as_dict()}, sort_keys=True))
+            else:
+                self.stderr.write(u'Phases: {phases}'.format(phases=self.phase_times))
+        search_finished.send(sender=self.__class__, queries=queries, phases=self.phase_times.as_dict())
+
+    def write_stats(self, query):
+        field_names = self.get_searched_field_names(query)
+        if self.writer:
+            self.stderr.write(json.dumps({
+                'model': get_model_label(query['manager'].model), 'fields': field_names,
+                'database': self.get_connection(query).alias, 'rows': query['rows'], 'seconds': query['seconds'],
+                'cpu_seconds': query['cpu_seconds'], 'text_length': query['text_length'], 'sql': query['sql'],
+                'render_queries': query['render_queries'],
+            }, sort_keys=True))
+            return
+        rows = u'' if query['rows'] is None else u'{rows} rows in '.format(rows=query['rows'])
+        self.stderr.write(u'{description}: {rows}{seconds:.3f}s ({cpu_seconds:.3f}s CPU), {text_length} characters '
+                          u'of text, {queries} SQL queries'.format(
+                              description=self.get_description(query, field_names), rows=rows,
+                              seconds=query['seconds'], cpu_seconds=query['cpu_seconds'],
+                              text_length=query['text_length'], queries=len(query['sql'])))
+        if self.verbosity >= 2:
+            for sql in query['sql']:
+                self.stderr.write(u'    {time}s {sql}'.format(**sql))
+        if query['render_queries']:
+            self.stderr.write(u'Warning: {render_queries} of the SQL queries were run while showing the results, e.g. '
+                              u'by __str__ following a relation for each one: load it with --select-related or '
+                              u'--prefetch-related'.format(render_queries=query['render_queries']))
+
+    def write_counts(self, query, counts):
+        for field_name, count in counts:
+            self.stdout.write(u'{description}: {count}'.format(
+                description=self.get_description(query, [field_name]), count=count))
+
+    def get_description(self, query, field_names):
+        description = u'{model} {fields}'.format(model=get_model_label(query['manager'].model),
+                                                 fields=', '.join(field_names))
+        if 'using' in query:
+            description += u' [{alias}]'.format(alias=query['using'])
+        return description
+
+    def write_combined_results(self, query, results):
+        """Writes out the results of a single-scan query grouped by the field(s) that matched. With --stream, they
+        are grouped a chunk at a time, so that no more than a chunk is held in memory, and each field's header is
+        written again for each chunk it has matches in.
+        """
+        written = dict.fromkeys(query['field_names'], 0)
+        for chunk in (get_chunks(results, self.chunk_size) if self.stream else [results]):
+            matches = OrderedDict((field_name, []) for field_name in query['field_names'])
+            for result in chunk:
+                for index, (field_name, field_results) in enumerate(matches.items()):
+                    if self.pks_only:
+                        # which fields matched is worked out by the database, and loaded alongside the primary key
+                        if result[index + 1]:
+                            field_results.append(result[:1])
+                    elif self.field_matches(result, field_name):
+                        field_results.append(result)
+            for field_name, field_results in matches.items():
+                if self.max_count is not None:
+                    # the limit is for each field over all of the chunks
+                    field_results = field_results[:self.max_count - written[field_name]]
+                if field_results:
+                    self.write_results(dict(query, field_name=field_name), field_results)
+                    written[field_name] += len(field_results)
+
+    def get_result_title(self, result, query):
+        model = query['manager'].model
+        if self.no_str:
+            return u'{model} (pk={pk})'.format(model=model._meta.object_name, pk=result.pk)
+        if uses_default_str(model):
+            # deferred loading swaps in a generated subclass, whose name the default __str__ would use
+            return u'{model} object (pk={pk})'.format(model=model._meta.object_name, pk=result.pk)
+        return u'{result} (pk={result.pk})'.format(result=result)
+
+    def field_matches(self, result, field_name):
+        if not self.backend.uses_regex:
+            # words can match in ways the highlight pattern doesn't (e.g. other forms of them), so this is worked
+            # out by the database, and loaded alongside each result
+            return bool(getattr(result, self.get_field_match_name(field_name)))
+        value = getattr(result, field_name)
+        if value is None:
+            return False
+        return self.regex.search(force_text(value)) is not None
+
+    def compile_regexes(self):
+        """Compiles the pattern once for each of the ways it is matched in Python: against a whole field value,
+        across lines when showing the whole value, and line by line when showing matching lines
+        """
+        flags = re.IGNORECASE if self.ignore_case else 0
+        pattern = self.backend.get_highlight_pattern(self.pattern)
+        self.regex = re.compile(pattern, flags)
+        self.regex_all = re.compile(pattern, flags | re.DOTALL)
+        self.regex_lines = re.compile(pattern, flags | re.MULTILINE)
+        self.pattern_regexes = [re.compile(pattern, flags) for pattern in self.patterns]
 
     def run_from_argv(self, argv):
-        # store raw args so that we can re-parse them with new defaults if preset mode is used
+        # store raw args so that the defaults of the preset can be set before they are parsed
         self.raw_args = argv[2:]
         super(Command, self).run_from_argv(argv)
 
@@ -98,6 +634,7 @@ class Command(BaseCommand):
             return
         from django.contrib.admin import site as admin_site
         self.admin_site = admin_site
+        self.admin_url_parts = {}
         hostnames = []
         for reference in from_options:
             hostnames.append(self.get_admin_hostname(reference))
@@ -131,6 +668,61 @@ class Command(BaseCommand):
             raise CommandError(msg.format(reference))
         return hostname
 
+    def get_str_fields(self):
+        str_fields = getattr(settings, 'DJANGO_GREPDB_STR_FIELDS', {})
+        try:
+            return {label.lower(): field_names for label, field_names in str_fields.items()}
+        except AttributeError:
+            raise CommandError(u'DJANGO_GREPDB_STR_FIELDS is not a dict-like object')
+
+    def get_related_options(self, values, option):
+        """Returns a dict of the relations given for each model label by the values of the option"""
+        relations = {}
+        for value in values or []:
+            parts = value.split('.')
+            if len(parts) != 3:
+                raise CommandError(u'{option} takes app_label.Model.relation, not "{value}"'.format(
+                    option=option, value=value))
+            label = u'{app_label}.{model_name}'.format(app_label=parts[0], model_name=parts[1]).lower()
+            relations.setdefault(label, []).append(parts[2])
+        return relations
+
+    def get_related(self, model):
+        """Returns the relations to load with select_related and with prefetch_related for the model's __str__:
+        those given in the options, and unless turned off, those which its source shows it follows
+        """
+        try:
+            return self.related[model]
+        except KeyError:
+            pass
+        label = get_model_label(model)
+        select_related = list(self.select_related.get(label, []))
+        prefetch_related = list(self.prefetch_related.get(label, []))
+        if self.auto_related:
+            str_select_related, str_prefetch_related = get_str_relations(model)
+            select_related.extend(path for path in str_select_related if path not in select_related)
+            prefetch_related.extend(path for path in str_prefetch_related if path not in prefetch_related)
+        self.related[model] = (select_related, prefetch_related)
+        return self.related[model]
+
+    def renders_str(self, model):
+        """Whether results of the model are shown with its __str__"""
+        return not (self.no_str or self.writer or self.count or self.pks_only or uses_default_str(model))
+
+    def with_related(self, query, results):
+        """Returns the results loading the relations that __str__ uses, so that showing them doesn't take a query
+        for each one
+        """
+        model = query['manager'].model
+        if not self.renders_str(model):
+            return results
+        select_related, prefetch_related = self.get_related(model)
+        if select_related:
+            results = results.select_related(*select_related)
+        if prefetch_related:
+            results = results.prefetch_related(*prefetch_related)
+        return results
+
     def get_preset(self, preset_name):
         if not preset_name:
             return None
@@ -153,105 +745,530 @@ class Command(BaseCommand):
             raise CommandError(msg.format(preset_name=preset_name))
         return preset
 
+    def get_databases(self, options):
+        if options['all_databases']:
+            # the default database first, then the rest in a consistent order
+            return sorted(connections.databases, key=lambda alias: (alias != DEFAULT_DB_ALIAS, alias))
+        databases = options['databases']
+        for alias in databases or []:
+            if alias not in connections.databases:
+                raise CommandError(u'Database "{alias}" is not configured in settings.DATABASES'.format(alias=alias))
+        return databases
+
     def get_queries(self, identifiers):
         queries = []
         for identifier in identifiers:
             queries.extend(self.get_queries_for_identifier(identifier))
+        for model, field_names in self.get_all_models(identifiers):
+            queries.extend(self.get_queries_for_model(model, field_names))
+        if self.databases:
+            queries = [dict(query, using=alias) for alias in self.databases for query in queries
+                       if self.is_routed(query['manager'].model, alias)]
         return queries
 
+    def is_routed(self, model, alias):
+        """Whether the model should be searched on the database. Every database named with --database is
+        searched, as it may be a replica. With --all-databases, a model is only searched on the databases which the
+        routers read it from or migrate it to, as its table may not exist on the others.
+        """
+        if not self.all_databases:
+            return True
+        return router.db_for_read(model) == alias or router.allow_migrate_model(alias, model)
+
+    def get_all_models(self, identifiers):
+        """Returns each model to search with --all-models, with the names of its fields of the field types"""
+        if not self.all_models:
+            if self.app_labels or self.exclude_app_labels:
+                raise CommandError(u'--app and --exclude-app can only be used with --all-models')
+            return []
+        if identifiers:
+            raise CommandError(u"Identifiers can't be given with --all-models: use --app to limit the models")
+        return get_catalogue(self.field_type, self.app_labels, self.exclude_app_labels)
+
     def get_queries_for_identifier(self, identifier):
-        model, field_names = self.parse_identifier(identifier)
-        queries = []
-        for field_name in field_names:
-            params = self.get_queryset_params(field_name)
-            queries.append(dict(manager=model._default_manager, params=params, field_name=field_name))
-        return queries
+        return self.get_queries_for_model(*self.parse_identifier(identifier))
+
+    def get_queries_for_model(self, model, field_names):
+        if self.single_scan:
+            return self.get_combined_queries(model, field_names)
+        return [dict(manager=model._default_manager, field_name=field_name) for field_name in field_names]
+
+    def get_combined_queries(self, model, field_names):
+        """Returns a single query matching rows where any of the fields match, so that the model is only scanned
+        once however many fields are searched
+        """
+        if not field_names:
+            return []
+        return [dict(manager=model._default_manager, field_names=field_names)]
+
+    def set_since_bounds(self, queries):
+        """Limits each query to rows whose since field is above the stored watermark for its model, and no higher
+        than its current highest value, which becomes the new watermark. Rows added while searching are left for
+        the next run.
+        """
+        self.watermarks = load_watermarks()
+        self.new_watermarks = {}
+        self.search_hash = self.get_search_hash()
+        for query in queries:
+            key = self.get_watermark_key(query)
+            if key not in self.new_watermarks:
+                field_name = self.get_since_field(query).name
+                manager = query['manager'].db_manager(self.get_connection(query).alias)
+                self.new_watermarks[key] = manager.aggregate(watermark=models.Max(field_name))['watermark']
+            query['since'] = (self.watermarks.get(key), self.new_watermarks[key])
+
+    def save_since_watermarks(self):
+        self.watermarks.update((key, value) for key, value in self.new_watermarks.items() if value is not None)
+        save_watermarks(self.watermarks)
+
+    def get_watermark_key(self, query):
+        return u'{preset}:{search}:{alias}:{model}:{field}'.format(
+            preset=self.preset_name, search=self.search_hash, alias=self.get_connection(query).alias,
+            model=get_model_label(query['manager'].model), field=self.since_field)
+
+    def get_search_hash(self):
+        """Returns a short hash of what is searched for and where, so that a --since run only uses up the rows of
+        runs of the same search
+        """
+        search = [self.patterns, self.identifiers, self.ignore_case, self.backend.name, self.field_type,
+                  self.all_models, self.app_labels, self.exclude_app_labels]
+        return hashlib.sha1(json.dumps(search).encode('utf-8')).hexdigest()[:12]
+
+    def get_since_field(self, query):
+        opts = query['manager'].model._meta
+        if self.since_field == 'pk':
+            return opts.pk
+        try:
+            return opts.get_field(self.since_field)
+        except models.FieldDoesNotExist:
+            raise CommandError(u'{model} has no field named "{field}" to use with --since'.format(
+                model=get_model_label(query['manager'].model), field=self.since_field))
+
+    def get_since_filter(self, query):
+        field = self.get_since_field(query)
+        lower, upper = query['since']
+        lookups = {}
+        if lower is not None:
+            lookups[field.name + '__gt'] = field.to_python(lower)
+        if upper is not None:
+            lookups[field.name + '__lte'] = upper
+        return lookups
 
     def search(self, query):
-        return query['manager'].filter(**query['params'])
+        manager = query['manager']
+        if 'using' in query:
+            manager = manager.db_manager(query['using'])
+        results = manager.filter(self.get_filter(query))
+        if 'since' in query:
+            results = results.filter(**self.get_since_filter(query))
+        if 'after' in query:
+            # continues a search from the last primary key seen, in primary key order
+            results = results.filter(pk__gt=query['after']).order_by('pk')
+        candidate_pks = self.get_index_candidates(query)
+        if candidate_pks is not None:
+            results = results.filter(pk__in=candidate_pks)
+        loaded_field_names = self.get_loaded_field_names(query)
+        if loaded_field_names is not None:
+            results = results.only(*loaded_field_names)
+        return results
+
+    def get_index_candidates(self, query):
+        """Returns the primary keys of the rows which the trigram index says could match, or None if the index
+        can't be used for this query. It's only used for the database it was built from.
+        """
+        model = query['manager'].model
+        if not (self.use_index and self.prefilter and self.literals):
+            return None
+        if query.get('using', router.db_for_read(model)) != router.db_for_read(model):
+            return None
+        from ...index.utils import get_candidate_pks
+        return get_candidate_pks(model, self.get_searched_field_names(query), self.literals)
+
+    def get_loaded_field_names(self, query):
+        """Returns the names of the fields that need to be loaded for each match, other than the primary key, or
+        None if the whole row should be loaded because it isn't known which fields __str__ uses
+        """
+        model = query['manager'].model
+        if not self.renders_str(model):
+            str_field_names = []
+        else:
+            str_field_names = self.str_fields.get(get_model_label(model))
+            if str_field_names is None:
+                return None
+            str_field_names = list(str_field_names) + self.get_related_field_names(model)
+        return self.get_searched_field_names(query) + str_field_names
+
+    def get_related_field_names(self, model):
+        """Returns the names of the model's own fields which the relations loaded for __str__ start from, as they
+        can't be deferred
+        """
+        field_names = []
+        for path in sum(self.get_related(model), []):
+            field_name = path.split('__')[0]
+            try:
+                concrete = model._meta.get_field(field_name).concrete
+            except models.FieldDoesNotExist:
+                continue
+            if concrete and field_name not in field_names:
+                field_names.append(field_name)
+        return field_names
+
+    def get_searched_field_names(self, query):
+        return list(query.get('field_names') or [query['field_name']])
+
+    def get_results(self, query):
+        connection = self.get_connection(query)
+        if connection.vendor == 'sqlite':
+            install_regexp(connection)
+        results = self.search(query)
+        if self.engine == 'python':
+            results = self.match_in_python(query, results)
+        else:
+            results = self.get_database_results(query, results)
+        if self.deadline is not None:
+            results = self.iterate_limited(connection, results)
+        if self.collect_stats:
+            results = self.iterate_timed(query, results)
+        return results
+
+    def iterate_limited(self, connection, results):
+        """Yields the results with the database stopping their statements at the deadline"""
+        with statement_timeout(connection, self.deadline):
+            for result in results:
+                yield result
+
+    def get_database_results(self, query, results):
+        if self.count:
+            return self.get_counts(query, results)
+        if self.pks_only:
+            results = self.get_pks(query, results)
+        else:
+            results = self.with_related(query, results)
+            if 'field_names' in query and not self.backend.uses_regex:
+                results = results.annotate(**self.get_field_match_annotations(query))
+        limit = self.get_limit()
+        if self.stream:
+            return self.iterate_in_chunks(results, limit)
+        if limit is not None:
+            return results[:limit]
+        return results
+
+    def match_in_python(self, query, results):
+        """Returns the results of the query matched by the python engine, in the same form as they would be from
+        the database. Rows are read in chunks of just the primary key and searched fields, and objects are only
+        loaded for the matches.
+        """
+        field_names = self.get_searched_field_names(query)
+        rows = self.iterate_in_chunks(results.values_list('pk', *field_names))
+        if self.collect_stats:
+            rows = self.iterate_counting_text(query, rows)
+        flags = re.IGNORECASE if self.ignore_case else 0
+        matches = match_chunks(self.pattern, flags, get_chunks(rows, self.chunk_size), self.get_process_pool(),
+                               pending_limit=2 * self.jobs)
+        if self.count:
+            return count_matches(field_names, matches)
+        matches = islice(matches, self.get_limit())
+        if not self.pks_only:
+            return load_matches(self.with_related(query, results), (pk for pk, fields_match in matches))
+        if 'field_names' in query:
+            return ((pk,) + tuple(fields_match) for pk, fields_match in matches)
+        return ((pk,) for pk, fields_match in matches)
+
+    def get_process_pool(self):
+        if self.jobs == 1:
+            return None
+        if self.process_pool is None:
+            from multiprocessing import Pool
+            # the forked processes would share the sockets of any open connections, so they are closed first.
+            # Those in a transaction are left open, as closing them would lose it, and the processes only match
+            # rows, so never use them.
+            for connection in connections.all():
+                if not connection.in_atomic_block:
+                    connection.close()
+            self.process_pool = Pool(self.jobs)
+        return self.process_pool
+
+    def get_counts(self, query, results):
+        """Yields the name of each field searched with the number of rows where it matches, all counted in one
+        query. For a single-scan query, rows are counted for each field with a conditional aggregate.
+        """
+        if 'field_names' not in query:
+            yield query['field_name'], results.count()
+            return
+        vendor = self.get_vendor(query)
+        counts = results.aggregate(**OrderedDict(
+            (u'grepdb_{field_name}'.format(field_name=field_name),
+             models.Count(models.Case(models.When(self.get_field_filter(field_name, vendor), then=1))))
+            for field_name in query['field_names']))
+        for field_name in query['field_names']:
+            yield field_name, counts[u'grepdb_{field_name}'.format(field_name=field_name)]
+
+    def get_pks(self, query, results):
+        """Returns the primary keys of the results in 1-tuples. For a single-scan query, each is followed by
+        whether each field matches, worked out by the database with conditional expressions.
+        """
+        if 'field_names' not in query:
+            return results.values_list('pk')
+        matches = self.get_field_match_annotations(query)
+        return results.annotate(**matches).values_list('pk', *matches)
+
+    def get_field_match_annotations(self, query):
+        """Returns annotations of whether each field of a single-scan query matches, as 1 or 0"""
+        vendor = self.get_vendor(query)
+        return OrderedDict(
+            (self.get_field_match_name(field_name),
+             models.Case(models.When(self.get_field_filter(field_name, vendor), then=models.Value(1)),
+                         default=models.Value(0), output_field=models.IntegerField()))
+            for field_name in query['field_names'])
+
+    def get_field_match_name(self, field_name):
+        return u'grepdb_{field_name}'.format(field_name=field_name)
+
+    def iterate_timed(self, query, results):
+        """Yields results, recording on the query how many there were, the wall and CPU time it took to fetch them,
+        the length of the searched text loaded, and the SQL run. Only time spent fetching the next result is counted,
+        not the time spent writing out the previous one. Queries run while writing out results, e.g. by a __str__
+        following a relation for each one, are counted separately as render_queries.
+        """
+        # counts are worked out by the database, so there are no rows to count
+        query.update(rows=None if self.count else 0, text_length=0, sql=[], render_queries=0)
+        connection = self.get_connection(query)
+        force_debug_cursor = connection.force_debug_cursor
+        connection.force_debug_cursor = True
+        logged_queries = len(connection.queries_log)
+        # querysets run their query when they are first iterated over
+        start, cpu_start = time.time(), cpu_time()
+        results = iter(results)
+        query['seconds'], query['cpu_seconds'] = time.time() - start, cpu_time() - cpu_start
+        fetched_queries = len(connection.queries_log)
+        try:
+            while True:
+                query['render_queries'] += len(connection.queries_log) - fetched_queries
+                start, cpu_start = time.time(), cpu_time()
+                try:
+                    result = next(results)
+                except StopIteration:
+                    return
+                finally:
+                    query['seconds'] += time.time() - start
+                    query['cpu_seconds'] += cpu_time() - cpu_start
+                    fetched_queries = len(connection.queries_log)
+                if not self.count:
+                    query['rows'] += 1
+                if self.engine == 'database' and isinstance(result, models.Model):
+                    query['text_length'] += sum(len(getattr(result, field_name) or '')
+                                                for field_name in self.get_searched_field_names(query))
+                yield result
+        finally:
+            query['sql'] = list(connection.queries_log)[logged_queries:]
+            connection.force_debug_cursor = force_debug_cursor
+
+    def iterate_counting_render_queries(self, query, results):
+        """Yields results loaded by a worker thread, counting the queries run on this thread's connection while
+        they're written out as the query's render_queries: the worker's connection is closed by then.
+        """
+        connection = self.get_connection(query)
+        force_debug_cursor = connection.force_debug_cursor
+        connection.force_debug_cursor = True
+        logged_queries = len(connection.queries_log)
+        try:
+            for result in results:
+                yield result
+        finally:
+            render_sql = list(connection.queries_log)[logged_queries:]
+            query['render_queries'] += len(render_sql)
+            query['sql'] = query['sql'] + render_sql
+            connection.force_debug_cursor = force_debug_cursor
+
+    def iterate_counting_text(self, query, rows):
+        """Yields rows of the python engine, adding the length of their text to the query's"""
+        for row in rows:
+            query['text_length'] += sum(len(value or '') for value in row[1:])
+            yield row
+
+    def iterate_in_chunks(self, results, limit=None):
+        """Yields results in primary key order, fetching chunk_size rows at a time with a query keyed on the last
+        primary key seen, so that only one chunk is ever held in memory. If there's a limit, no more rows than that
+        are fetched in total.
+        """
+        results = results.order_by('pk')
+        last_pk = None
+        while True:
+            chunk = results if last_pk is None else results.filter(pk__gt=last_pk)
+            chunk_size = self.chunk_size if limit is None else min(self.chunk_size, limit)
+            fetched = 0
+            chunk = chunk[:chunk_size]
+            # iterator() skips prefetching, so only use it when there's nothing to prefetch
+            for result in (chunk if chunk._prefetch_related_lookups else chunk.iterator()):
+                fetched += 1
+                last_pk = result[0] if isinstance(result, tuple) else result.pk
+                yield result
+            if limit is not None:
+                limit -= fetched
+            if fetched < chunk_size or limit == 0:
+                return
 
     def parse_identifier(self, identifier):
-        parts = identifier.split('.')
-        app_label, model_name = parts[:2]
-        field_names = parts[2:]
-        model = apps.get_model(app_label, model_name)
-        if not field_names:
-            field_names = self.get_field_names_for_model(model)
-        return (model, field_names)
+        return parse_identifier(identifier, self.field_type)
 
-    def get_field_names_for_model(self, model):
-        return [field.name for field in model._meta.fields if field.get_internal_type() in self.field_type]
+    def get_filter(self, query):
+        """Returns a Q object matching rows where any of the query's fields match the pattern"""
+        vendor = self.get_vendor(query)
+        if self.backend.vendors and vendor not in self.backend.vendors:
+            msg = '--backend {backend} is only supported on {vendors} databases, not {vendor}'
+            raise CommandError(msg.format(backend=self.backend.name, vendors=', '.join(self.backend.vendors),
+                                          vendor=vendor))
+        return reduce(operator.or_, [self.get_field_filter(field_name, vendor)
+                                     for field_name in self.get_searched_field_names(query)])
 
-    def get_queryset_params(self, field_name):
-        lookup_type = 'regex'
-        if self.ignore_case:
-            lookup_type = 'i' + lookup_type
-        return {'{field_name}__{lookup_type}'.format(field_name=field_name, lookup_type=lookup_type): self.pattern}
+    def get_vendor(self, query):
+        return self.get_connection(query).vendor
+
+    def get_connection(self, query):
+        return connections[query.get('using') or router.db_for_read(query['manager'].model)]
+
+    def get_field_filter(self, field_name, vendor):
+        """Returns a Q object matching the pattern against the field. Literal text that the pattern requires is
+        looked for first with contains lookups, which are much cheaper than a regex and can make use of indexes. If
+        the pattern is entirely literal, the regex isn't needed at all. Other backends use their own lookup instead
+        of the regex, and the python engine only uses the literals.
+        """
+        prefix = 'i' if self.ignore_case else ''
+        literals = self.get_prefilter_literals(vendor)
+        lookups = [(u'{field_name}__{prefix}contains'.format(field_name=field_name, prefix=prefix), literal)
+                   for literal in literals]
+        # SQLite's LIKE is always case-insensitive, so it can't replace a case-sensitive regex
+        uses_regex = not (self.literal_pattern and literals and (self.ignore_case or vendor != 'sqlite'))
+        if uses_regex and self.engine == 'database':
+            lookup = self.backend.get_lookup(self.ignore_case)
+            lookups.append((u'{field_name}__{lookup}'.format(field_name=field_name, lookup=lookup),
+                            self.get_database_pattern(vendor)))
+        return reduce(operator.and_, [Q(**{lookup: value}) for lookup, value in lookups], Q())
+
+    def get_prefilter_literals(self, vendor):
+        if not self.prefilter:
+            return []
+        if self.ignore_case and vendor == 'sqlite':
+            # SQLite's LIKE only ignores the case of ASCII characters
+            return [literal for literal in self.literals if all(ord(char) < 128 for char in literal)]
+        return self.literals
 
     def get_value(self, result, query):
-        text = getattr(result, query['field_name'])
-        show_values = self.show_values
+        return self.get_snippet(getattr(result, query['field_name']), self.show_values)
+
+    def get_snippet(self, text, show_values):
         if show_values == 'a':
             return self.get_value_all(text)
         elif show_values == 'l':
             return self.get_value_line(text)
         else:
-            return self.get_value_surrounded(text)
+            return self.get_value_surrounded(text, show_values)
 
     def get_value_all(self, text):
-        regex_args = [self.pattern, text, re.DOTALL]
-        if self.ignore_case:
-            regex_args[2] += re.IGNORECASE
-        matches = [m.span() for m in re.finditer(*regex_args)]
-        value = u''
-        end_of_previous = 0
-        for start, end in matches:
-            value = value + text[end_of_previous:start] + colored(text[start:end], 'grey', 'on_yellow')
-            end_of_previous = end
-        value = value + text[end_of_previous:] + '\n\n'
-        return value
+        pieces = []
+        spans = (match.span() for match in self.regex_all.finditer(text))
+        self.add_highlighted(pieces, text, 0, len(text), spans)
+        pieces.append('\n\n')
+        return u''.join(pieces)
 
     def get_value_line(self, text):
-        value = u''
-        for line in text.splitlines():
-            regex_args = [self.pattern, line]
-            if self.ignore_case:
-                regex_args.append(re.IGNORECASE)
-            matches = [m.span() for m in re.finditer(*regex_args)]
-            if matches:
-                end_of_previous = 0
-                for start, end in matches:
-                    value = value + line[end_of_previous:start] + colored(line[start:end], 'grey', 'on_yellow')
-                    end_of_previous = end
-                value = value + line[end_of_previous:] + '\n\n'
-        return value
-
-    def get_value_surrounded(self, text):
-        regex_args = [self.pattern, text]
-        if self.ignore_case:
-            regex_args.append(re.IGNORECASE)
-        matches = re.findall(*regex_args)
-        chars = self.show_values
-        matches = [m.span() for m in re.finditer(*regex_args)]
-        value = u''
-        end_of_previous = 0
-        for start, end in matches:
-            if end_of_previous and end_of_previous > start:
-                value = value[:start - end_of_previous]
-            elif end_of_previous and end_of_previous > start - chars:
-                value += text[end_of_previous:start]
+        pieces = []
+        for line_start, line_end, spans in self.get_matching_lines(text):
+            self.add_highlighted(pieces, text, line_start, line_end, spans)
+            pieces.append('\n\n')
+        return u''.join(pieces)
+
+    def get_value_surrounded(self, text, chars):
+        pieces = []
+        for window_start, window_end, spans in self.get_match_windows(text, chars):
+            pieces.append('\n')
+            self.add_highlighted(pieces, text, window_start, window_end, spans)
+        return u''.join(pieces).strip() + '\n\n'
+
+    def add_highlighted(self, pieces, text, start, end, spans):
+        """Appends text[start:end] to the list of pieces, with the given (ordered, non-overlapping) spans of
+        matches within it highlighted. Output is built up as a list of pieces to be joined once at the end, so that
+        the time taken is linear in the number of matches.
+        """
+        end_of_previous = start
+        for match_start, match_end in spans:
+            pieces.append(text[end_of_previous:match_start])
+            pieces.append(self.colored(text[match_start:match_end], 'grey', 'on_yellow'))
+            end_of_previous = match_end
+        pieces.append(text[end_of_previous:end])
+
+    def get_matching_lines(self, text):
+        """Yields the bounds of each line with a match, along with the spans of the matches on it. The text is
+        searched as a whole for the next match, so that lines without any are skipped in one pass rather than split
+        off and searched one by one. The line that match is on is then searched on its own, so that matches are
+        limited to the line, as they would be if each line was searched separately.
+        """
+        position = 0
+        while True:
+            match = self.regex_lines.search(text, position)
+            if match is None:
+                return
+            line_start, line_end = self.get_line_bounds(text, match.start())
+            # empty matches right at the end of text ending with a line break aren't on a line
+            if line_start < len(text):
+                spans = [line_match.span() for line_match in self.regex_lines.finditer(text, line_start, line_end)]
+                if spans:
+                    yield line_start, line_end, spans
+            position = text.find('\n', match.start()) + 1
+            if not position:
+                return
+
+    def get_line_bounds(self, text, position):
+        start = text.rfind('\n', 0, position) + 1
+        end = text.find('\n', position)
+        if end == -1:
+            end = len(text)
+        if end > start and text[end - 1] == '\r':
+            end -= 1
+        return start, end
+
+    def get_match_windows(self, text, chars):
+        """Yields windows of the text showing each match with the given number of characters either side of it,
+        along with the spans of the matches in each window. Matches whose surrounding characters would overlap or
+        touch are merged into the same window.
+        """
+        window = None
+        for match in self.regex.finditer(text):
+            start, end = match.span()
+            if window is not None and start - window[2][-1][1] <= 2 * chars:
+                window[2].append((start, end))
+                window[1] = end + chars
             else:
-                value += '\n' + text[start - chars:start]
-            value += colored(text[start:end], 'grey', 'on_yellow') + text[end:end + chars]
-            end_of_previous = end + chars
-        value = value.strip() + '\n\n'
-        return value
-
-    def get_admin_links(self, result):
-        content_type = ContentType.objects.get_for_model(result)
-        admin_url_pattern = 'admin:{app}_{model}_change'.format(app=content_type.app_label, model=content_type.model)
-        relative_url = reverse(admin_url_pattern, args=[result.pk])
-        return '\n'.join([colored(hostname + relative_url, 'green') for hostname in self.admin_hostnames])
+                if window is not None:
+                    yield window
+                # a negative start would slice from the end of the text instead
+                window = [max(0, start - chars), end + chars, [(start, end)]]
+        if window is not None:
+            yield window
+
+    def get_admin_links(self, result, query):
+        return '\n'.join([self.colored(url, 'green') for url in self.get_admin_urls(result, query)])
+
+    def get_admin_urls(self, result, query):
+        pk = urlquote(result.pk, safe=RFC3986_SUBDELIMS + '/~:@')
+        return [prefix + pk + suffix for prefix, suffix in self.get_admin_url_parts(query['manager'].model)]
+
+    def get_admin_url_parts(self, model):
+        """Returns a (prefix, suffix) pair for each admin hostname, which the primary key of a match is inserted
+        between to make its admin link. The URL is only reversed once for each model, with a placeholder in place
+        of the primary key, as every match in a query is from the same model.
+        """
+        try:
+            return self.admin_url_parts[model]
+        except KeyError:
+            pass
+        from django.core.urlresolvers import reverse
+        opts = model._meta.concrete_model._meta
+        admin_url_pattern = 'admin:{app}_{model}_change'.format(app=opts.app_label, model=opts.model_name)
+        prefix, suffix = reverse(admin_url_pattern, args=[ADMIN_PK_PLACEHOLDER]).split(ADMIN_PK_PLACEHOLDER)
+        parts = [(hostname + prefix, suffix) for hostname in self.admin_hostnames]
+        self.admin_url_parts[model] = parts
+        return parts
 
     def get_version(self):
         from ...version import VERSION
@@ -0,0 +1,70 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.utils import truncate_name
+
+from ...backends import get_search_config
+from ...identifiers import get_preset_fields
+
+# search configuration names, optionally qualified by a schema, which can be put in a SQL string literal as they are
+SEARCH_CONFIG_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$')
+
+
+class Command(BaseCommand):
+    help = 'Creates PostgreSQL GIN indexes for the fields searched by DJANGO_GREPDB_PRESETS, so that grepdb searches ' \
+           'of them can use an index instead of scanning every row. Needs PostgreSQL 9.5 or later, for CREATE INDEX ' \
+           'IF NOT EXISTS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('presets', nargs='*', type=str,
+                            help='Only create indexes for the fields searched by these presets')
+        parser.add_argument('--kind', choices=['trigram', 'fulltext'], default='trigram',
+                            help='"trigram" (the default) creates pg_trgm indexes, used by regex and similarity '
+                            'searches. "fulltext" creates full text search indexes, used by --backend fulltext.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Alias of the database to create them in')
+        parser.add_argument('--print', dest='dry_run', action='store_true',
+                            help='Print the SQL instead of running it')
+
+    def handle(self, **options):
+        presets = options['presets'] or None
+        fields = get_preset_fields(presets)
+        if not fields:
+            raise CommandError(u'No fields to index: no matching presets in DJANGO_GREPDB_PRESETS')
+        if options['kind'] == 'fulltext' and not SEARCH_CONFIG_RE.match(get_search_config()):
+            raise CommandError(u'DJANGO_GREPDB_SEARCH_CONFIG "{config}" is not the name of a search configuration'
+                               .format(config=get_search_config()))
+        connection = connections[options['database']]
+        if not options['dry_run'] and connection.vendor != 'postgresql':
+            raise CommandError(u'Indexes can only be created on PostgreSQL databases, not {vendor}'.format(
+                vendor=connection.vendor))
+        statements = self.get_statements(fields, options['kind'], connection)
+        if options['dry_run']:
+            for statement in statements:
+                self.stdout.write(statement + ';')
+            return
+        with connection.cursor() as cursor:
+            for statement in statements:
+                self.stdout.write(statement)
+                cursor.execute(statement)
+
+    def get_statements(self, fields, kind, connection):
+        quote_name = connection.ops.quote_name
+        statements = []
+        if kind == 'trigram':
+            statements.append('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        models = sorted(fields.items(), key=lambda item: (item[0]._meta.app_label, item[0]._meta.model_name))
+        for model, field_names in models:
+            table = model._meta.db_table
+            for field_name in sorted(field_names):
+                column = model._meta.get_field(field_name).column
+                if kind == 'trigram':
+                    expression = u'{column} gin_trgm_ops'.format(column=quote_name(column))
+                else:
+                    expression = u"to_tsvector('{config}'::regconfig, {column})".format(
+                        config=get_search_config(), column=quote_name(column))
+                name = truncate_name(u'grepdb_{table}_{column}_{kind}'.format(table=table, column=column, kind=kind),
+                                     connection.ops.max_name_length())
+                statements.append(u'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING gin ({expression})'
+                                  .format(name=quote_name(name), table=quote_name(table), expression=expression))
+        return statements
@@ -0,0 +1,165 @@
+import re
+import sys
+from itertools import groupby
+
+try:
+    # Python 3.11 deprecated the old name
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+# shortest literal worth adding as a filter: shorter substrings rule out too few rows to be worth the extra work
+MIN_LITERAL_LENGTH = 3
+
+QUANTIFIER_RE = re.compile(r'\{(\d*)(?:,\d*)?\}')
+# escaped punctuation which isn't a plain literal in every dialect, e.g. \< is a word boundary in GNU regexes
+NON_LITERAL_ESCAPES = '<>`\''
+# database vendors whose regex dialects have non-capturing groups, (?:...), which patterns are combined with. Others
+# (e.g. MySQL before 8.0) get plain groups.
+NON_CAPTURING_GROUP_VENDORS = ('sqlite', 'postgresql')
+# the most groups Python 2's re module can compile in one pattern (Python 3's has no limit)
+MAX_GROUPS = 99 if sys.version_info[0] == 2 else None
+
+
+def get_required_literals(pattern):
+    """Works out substrings which any text matching the pattern must contain, so that they can be used to filter
+    out rows with cheaper (and indexable) substring lookups before the regex is applied.
+
+    Only handles the syntax that Python, POSIX and MySQL regular expressions share, and errs on the side of
+    requiring nothing: groups, character classes, escape sequences other than escaped punctuation, and anything
+    that is optional or repeated break up literals, and any alternation outside a group means nothing is required.
+    Nothing is required either if the pattern has embedded options like (?i), as they can change the meaning of
+    the whole pattern.
+
+    Returns a tuple of the list of required literals and whether the whole pattern is a plain literal, in which
+    case the pattern's only literal can be looked for instead of the regex.
+    """
+    if '(?' in pattern:
+        return [], False
+    atoms = []  # each is a literal character, or None where the pattern could match something else
+    exact = True
+    i = 0
+    while i < len(pattern):
+        if pattern[i] == '|':
+            return [], False
+        i, is_literal = add_atom(pattern, i, atoms)
+        exact = exact and is_literal
+    literals = [u''.join(run) for is_literal, run in groupby(atoms, lambda atom: atom is not None) if is_literal]
+    if exact:
+        return literals, bool(atoms)
+    return [literal for literal in literals if len(literal) >= MIN_LITERAL_LENGTH], False
+
+
+def add_atom(pattern, start, atoms):
+    """Adds the atom at the start index to the list of atoms, or makes the previous atom optional if it's a
+    quantifier. Returns the index of the next atom, and whether this one is plain literal text.
+    """
+    char = pattern[start]
+    if char == '\\':
+        escaped = pattern[start + 1:start + 2]
+        is_literal = bool(escaped) and not escaped.isalnum() and escaped not in NON_LITERAL_ESCAPES
+        atoms.append(escaped if is_literal else None)
+        return start + 2, is_literal
+    if char == '[':
+        atoms.append(None)
+        return find_class_end(pattern, start) + 1, False
+    if char == '(':
+        atoms.append(None)
+        return find_group_end(pattern, start) + 1, False
+    if char in '*?':
+        make_previous_optional(atoms)
+        return start + 1, False
+    if char == '{' and is_quantifier(pattern, start):
+        quantifier = QUANTIFIER_RE.match(pattern, start)
+        if not int(quantifier.group(1) or 0):
+            make_previous_optional(atoms)
+        else:
+            atoms.append(None)
+        return quantifier.end(), False
+    if char in '.^$)+':
+        atoms.append(None)
+        return start + 1, False
+    atoms.append(char)
+    return start + 1, True
+
+
+def is_quantifier(pattern, start):
+    """Whether the brace at start opens a quantifier, rather than being a literal brace"""
+    quantifier = QUANTIFIER_RE.match(pattern, start)
+    return quantifier is not None and any(char.isdigit() for char in quantifier.group())
+
+
+def make_previous_optional(atoms):
+    if atoms:
+        atoms[-1] = None
+
+
+def find_class_end(pattern, start):
+    """Returns the index of the closing bracket of the character class opened at start"""
+    i = start + 1
+    if pattern[i:i + 1] == '^':
+        i += 1
+    if pattern[i:i + 1] == ']':
+        # a closing bracket straight after the opening one is part of the class
+        i += 1
+    while i < len(pattern) and pattern[i] != ']':
+        if pattern[i] == '\\':
+            i += 1
+        elif pattern[i:i + 2] in ('[:', '[.', '[='):
+            # POSIX classes like [:alpha:] contain their own closing bracket
+            closing = pattern.find(pattern[i + 1] + ']', i + 2)
+            if closing != -1:
+                i = closing + 1
+        i += 1
+    return i
+
+
+def find_group_end(pattern, start):
+    """Returns the index of the closing parenthesis of the group opened at start"""
+    depth = 0
+    i = start
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            i += 1
+        elif char == '[':
+            i = find_class_end(pattern, i)
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if not depth:
+                return i
+        i += 1
+    return i
+
+
+def has_backreferences(pattern):
+    """Whether the pattern refers back to one of its groups, by number (e.g. \\1) or by name (e.g. (?P=word)).
+    Escaped digits inside character classes aren't backreferences, and are skipped.
+    """
+    i = 0
+    while i < len(pattern):
+        if pattern[i] == '\\':
+            escaped = pattern[i + 1:i + 2]
+            if escaped.isdigit() and escaped != '0':
+                return True
+            i += 2
+        elif pattern[i] == '[':
+            i = find_class_end(pattern, i) + 1
+        elif pattern.startswith('(?P=', i):
+            return True
+        else:
+            i += 1
+    return False
+
+
+def count_groups(pattern):
+    """Returns the number of groups in the pattern. It's only parsed, as compiling it fails with more than
+    MAX_GROUPS.
+    """
+    parsed = sre_parse.parse(pattern)
+    # Python 3.8 renamed the parser's state from pattern to state
+    state = parsed.state if hasattr(parsed, 'state') else parsed.pattern
+    # which counts the whole pattern as a group too
+    return state.groups - 1
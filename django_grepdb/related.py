@@ -0,0 +1,47 @@
+import inspect
+import re
+
+from django.db.models import FieldDoesNotExist
+from django.utils import six
+
+# a chain of attributes of self, e.g. self.site.owner.name
+ATTRIBUTE_CHAIN = re.compile(r'\bself((?:\.\w+)+)')
+
+
+def get_str_relations(model):
+    """Returns the relations which the model's __str__ follows, found by reading its source, as a list of paths to
+    load with select_related and a list to load with prefetch_related. Relations followed in other ways, e.g. in
+    methods which __str__ calls, aren't found.
+    """
+    method = getattr(model, '__unicode__', None) if six.PY2 else None
+    try:
+        source = inspect.getsource(method or model.__str__)
+    except (IOError, TypeError):
+        # e.g. defined in a compiled module
+        return [], []
+    select_related, prefetch_related = [], []
+    for chain in ATTRIBUTE_CHAIN.findall(source):
+        path, many = get_relation_path(model, chain.split('.')[1:])
+        paths = prefetch_related if many else select_related
+        if path and path not in paths:
+            paths.append(path)
+    return select_related, prefetch_related
+
+
+def get_relation_path(model, attributes):
+    """Returns the path of the relations at the start of the chain of attributes of an instance of the model, and
+    whether the last of them is to many objects (which can only be prefetched)
+    """
+    path = []
+    for attribute in attributes:
+        try:
+            field = model._meta.get_field(attribute)
+        except FieldDoesNotExist:
+            break
+        if not field.is_relation or field.related_model is None:
+            break
+        path.append(attribute)
+        if field.many_to_many or field.one_to_many:
+            return '__'.join(path), True
+        model = field.related_model
+    return '__'.join(path), False
@@ -0,0 +1,13 @@
+from django.dispatch import Signal
+
+# Sent by the grepdb command (as sender) once the results of each query have been written. When there are receivers,
+# the same statistics are collected as for --stats: the query dict, the number of rows returned (None with --count,
+# where the database only returns counts), the wall and CPU seconds taken to fetch them, the length of the text
+# loaded from the searched fields, the SQL run, as a list of dicts with 'sql' and 'time' keys, and how many of those
+# queries were run while showing the results.
+query_finished = Signal(providing_args=['query', 'rows', 'seconds', 'cpu_seconds', 'text_length', 'sql',
+                                        'render_queries'])
+
+# Sent by the grepdb command once all of the queries have been written, with a dict of the time spent in each phase
+# of the search (as returned by django_grepdb.stats.PhaseTimes.as_dict).
+search_finished = Signal(providing_args=['queries', 'phases'])
@@ -0,0 +1,36 @@
+import re
+
+from django.utils import six
+from django.utils.encoding import force_text
+
+# searches only use a pattern or two, so this is plenty
+REGEX_CACHE_SIZE = 32
+
+_regexes = {}
+
+
+def regexp(pattern, value):
+    """Implementation of SQLite's REGEXP function, which Django uses for regex and iregex lookups.
+
+    Django's own implementation looks the pattern up in the re module's cache and converts the value to text for
+    every row. This keeps its own cache of compiled patterns instead, so each row only needs a dict lookup before
+    the search, and only converts values which aren't already text.
+    """
+    if value is None:
+        return False
+    try:
+        regex = _regexes[pattern]
+    except KeyError:
+        if len(_regexes) >= REGEX_CACHE_SIZE:
+            # like the re module's cache, start again when full: cheaper than tracking use for every row
+            _regexes.clear()
+        regex = _regexes[pattern] = re.compile(pattern)
+    if not isinstance(value, six.text_type):
+        value = force_text(value)
+    return regex.search(value) is not None
+
+
+def install_regexp(connection):
+    """Replaces the REGEXP function on an SQLite connection with the cached implementation above"""
+    connection.ensure_connection()
+    connection.connection.create_function('regexp', 2, regexp)
@@ -0,0 +1,47 @@
+import datetime
+import json
+import os
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class WatermarkEncoder(DjangoJSONEncoder):
+    """Keeps the microseconds of datetimes, which DjangoJSONEncoder drops, so that a row saved just before the
+    watermark was taken isn't found again on the next run
+    """
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super(WatermarkEncoder, self).default(o)
+
+
+def get_state_file():
+    """Returns the path of the file to store watermarks in, which has to be set, as the current directory may
+    change between runs or not be writable
+    """
+    return getattr(settings, 'DJANGO_GREPDB_STATE_FILE', None)
+
+
+def load_watermarks():
+    """Returns the dict of watermarks stored by the last --since runs, keyed by preset, search, database, model and
+    field
+    """
+    try:
+        with open(get_state_file()) as state_file:
+            return json.load(state_file)
+    except IOError:
+        return {}
+
+
+def save_watermarks(watermarks):
+    """Stores the watermarks in the state file"""
+    save_json(get_state_file(), watermarks, cls=WatermarkEncoder)
+
+
+def save_json(path, data, cls=None):
+    """Writes the data to a JSON file, replacing it in one go so that it is never left half written"""
+    temporary_file = path + '.tmp'
+    with open(temporary_file, 'w') as f:
+        json.dump(data, f, cls=cls, indent=2, sort_keys=True)
+    os.rename(temporary_file, path)
@@ -0,0 +1,37 @@
+import time
+from collections import defaultdict
+
+# the CPU time of the process: time.process_time on Python 3, and time.clock (which measures it everywhere but
+# Windows) on Python 2, which is only looked up when needed, as Python 3.8 removed it
+cpu_time = getattr(time, 'process_time', None) or time.clock
+
+# fetching results includes running the query and making model instances from the rows
+PHASES = ('fetch', 'title', 'highlight', 'links', 'write')
+
+
+class PhaseTimes(object):
+    """Totals of the wall and CPU time spent in each phase of a search"""
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.cpu_seconds = defaultdict(float)
+
+    def add(self, phase, seconds, cpu_seconds):
+        self.seconds[phase] += seconds
+        self.cpu_seconds[phase] += cpu_seconds
+
+    def wrap(self, phase, function):
+        """Returns the function wrapped so that the time spent in it is added to the phase"""
+        def timed(*args, **kwargs):
+            start, cpu_start = time.time(), cpu_time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(phase, time.time() - start, cpu_time() - cpu_start)
+        return timed
+
+    def as_dict(self):
+        return {phase: {'seconds': self.seconds[phase], 'cpu_seconds': self.cpu_seconds[phase]} for phase in PHASES}
+
+    def __str__(self):
+        return ', '.join('{phase} {seconds:.3f}s ({cpu_seconds:.3f}s CPU)'.format(
+            phase=phase, seconds=self.seconds[phase], cpu_seconds=self.cpu_seconds[phase]) for phase in PHASES)
@@ -8,5 +8,6 @@ admin.site.register(TestModelTwo)
 
 
 urlpatterns = [
+    url(r'^admin/grep/', include('django_grepdb.urls')),
     url(r'^admin/', include(admin.site.urls)),
 ]
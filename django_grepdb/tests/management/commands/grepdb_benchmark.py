@@ -0,0 +1,154 @@
+import json
+import platform
+import random
+import resource
+import shlex
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from ....management import call_command
+from ....signals import query_finished, search_finished
+from ...models import TestModel, TestModelTwo
+
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore et '
+         'dolore magna aliqua {% block content %} {{ object.name }} <p> </p> <a href="#">').split(' ')
+NEEDLE = '{% custom_template_tag %}'
+DEFAULT_SCENARIOS = [
+    '{pattern} tests.TestModel tests.TestModelTwo',
+    '{pattern} tests.TestModel tests.TestModelTwo --single-scan',
+    '{pattern} tests.TestModel tests.TestModelTwo --no-prefilter',
+    '{pattern} tests.TestModel tests.TestModelTwo --stream',
+    '{pattern} tests.TestModel tests.TestModelTwo --engine python',
+    '{pattern} tests.TestModel tests.TestModelTwo --count',
+    '{pattern} tests.TestModel tests.TestModelTwo --pks-only',
+    '{pattern} tests.TestModel tests.TestModelTwo --format jsonl',
+]
+DEFAULT_PATTERN = 'custom_template_tag.*%}'
+
+
+class Command(BaseCommand):
+    help = 'Times grepdb searches of a synthetic corpus generated in the test models, and saves the results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows to generate in each test model')
+        parser.add_argument('--field-size', type=int, default=1000,
+                            help='Length of the text in each text field (char fields are at most 255 long)')
+        parser.add_argument('--density', type=float, default=0.01,
+                            help='Fraction of text fields containing a match for the pattern')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for generating the corpus')
+        parser.add_argument('--pattern', default=DEFAULT_PATTERN, help='Pattern to search for')
+        parser.add_argument('--scenario', dest='scenarios', action='append',
+                            help='grepdb arguments to time, where {pattern} is replaced by the pattern. Can be used '
+                            'more than once (default: a set of common options).')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Times to run each scenario. The fastest run is reported.')
+        parser.add_argument('--database', dest='databases', action='append',
+                            help='Alias of a database to benchmark, e.g. a local PostgreSQL one (default: default). '
+                            'Can be used more than once.')
+        parser.add_argument('--no-test-database', dest='test_database', action='store_false',
+                            help="Generate the corpus in the database as it is (inside a transaction which is rolled "
+                            "back) instead of in a new test database. Other connections, e.g. those of --jobs "
+                            "threads, won't see it.")
+        parser.add_argument('--output', help='File to save the results to as JSON')
+
+    def handle(self, **options):
+        scenarios = [shlex.split(scenario.format(pattern=options['pattern']))
+                     for scenario in options['scenarios'] or DEFAULT_SCENARIOS]
+        results = {
+            'config': {key: options[key] for key in ('rows', 'field_size', 'density', 'seed', 'pattern', 'repeat')},
+            'environment': {'python': platform.python_version(), 'django': django.get_version()},
+            'results': [],
+        }
+        for alias in options['databases'] or ['default']:
+            if alias not in connections.databases:
+                raise CommandError(u'Database "{alias}" is not configured in settings.DATABASES'.format(alias=alias))
+            results['results'].extend(self.benchmark_database(alias, scenarios, options))
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2, sort_keys=True)
+
+    def benchmark_database(self, alias, scenarios, options):
+        connection = connections[alias]
+        if options['test_database']:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with transaction.atomic(using=alias):
+                self.generate_corpus(alias, options)
+                results = [self.benchmark(alias, args, options['repeat']) for args in scenarios]
+                transaction.set_rollback(True, using=alias)
+        finally:
+            if options['test_database']:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        return results
+
+    def generate_corpus(self, alias, options):
+        generator = random.Random(options['seed'])
+        size = options['field_size']
+        for model in (TestModel, TestModelTwo):
+            model.objects.using(alias).bulk_create(
+                [model(text_field=self.generate_text(generator, size, options['density']),
+                       char_field=self.generate_text(generator, min(size, 255), options['density']))
+                 for i in range(options['rows'])], batch_size=500)
+
+    def generate_text(self, generator, size, density):
+        words = []
+        length = 0
+        if generator.random() < density:
+            words.append(NEEDLE)
+            length += len(NEEDLE) + 1
+        while length < size:
+            word = generator.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        generator.shuffle(words)
+        return u' '.join(words)[:size]
+
+    def benchmark(self, alias, args, repeat):
+        args = args + ['--database', alias]
+        runs = [self.run(alias, args) for i in range(repeat)]
+        best = min(runs, key=lambda run: run['seconds'])
+        self.stdout.write(u'{vendor} {args}: {seconds:.3f}s, {queries} queries, {rows} rows'.format(
+            vendor=connections[alias].vendor, args=' '.join(args), **best))
+        return dict(best, database=alias, vendor=connections[alias].vendor, args=args,
+                    all_seconds=[run['seconds'] for run in runs])
+
+    def run(self, alias, args):
+        stats = {'rows': 0}
+
+        def count_rows(sender, rows, **kwargs):
+            # None with --count, which doesn't fetch any rows
+            stats['rows'] += rows or 0
+
+        def save_phases(sender, phases, **kwargs):
+            stats['phases'] = phases
+
+        query_finished.connect(count_rows)
+        search_finished.connect(save_phases)
+        try:
+            with CaptureQueriesContext(connections[alias]) as queries:
+                start = time.time()
+                call_command('grepdb', *args, stdout=StringIO(), stderr=StringIO(), no_color=True)
+                seconds = time.time() - start
+        finally:
+            query_finished.disconnect(count_rows)
+            search_finished.disconnect(save_phases)
+        phases = {phase: times['seconds'] for phase, times in stats['phases'].items()}
+        query_seconds = sum(float(query['time']) for query in queries)
+        # the time to execute queries, which on some databases (e.g. SQLite) find rows as they are fetched, in
+        # which case the time to find them is counted as materialisation instead
+        phases['query'] = query_seconds
+        phases['materialisation'] = max(phases.pop('fetch') - query_seconds, 0)
+        return {
+            'seconds': seconds,
+            'queries': len(queries),
+            'rows': stats['rows'],
+            # the peak for the whole process so far, as there is no portable way to reset it between runs
+            'peak_memory_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'phases': phases,
+        }
@@ -0,0 +1,57 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.six import StringIO
+
+from ....management.commands.grepdb import Command as GrepdbCommand
+
+DEFAULT_MATCHES = [1000, 10000, 100000]
+DEFAULT_SHOW_VALUES = ['a', 'l', '10']
+PATTERN = 'fox'
+
+
+class Command(BaseCommand):
+    help = 'Times highlighting matches in values with more and more of them, to check that it scales linearly'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--matches', type=int, action='append',
+                            help='Number of matches in the value to highlight. Can be used more than once '
+                            '(default: 1000, 10000 and 100000).')
+        parser.add_argument('--show-values', dest='show_values', action='append',
+                            help='A --show-values option to highlight with, a, l or a number of characters. Can be '
+                            'used more than once (default: a, l and 10).')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Times to highlight each value. The fastest run is reported.')
+        parser.add_argument('--output', help='File to save the results to as JSON')
+
+    def handle(self, **options):
+        command = self.get_grepdb_command()
+        results = []
+        for show_values in options['show_values'] or DEFAULT_SHOW_VALUES:
+            if show_values not in ('a', 'l'):
+                show_values = int(show_values)
+            for matches in options['matches'] or DEFAULT_MATCHES:
+                # a match on every other line, so that lines, windows and the text between matches all grow with it
+                text = u'the quick brown fox\njumped over the lazy dog\n' * matches
+                seconds = min(self.time(command, text, show_values) for i in range(options['repeat']))
+                self.stdout.write(u'{show_values} {matches} matches: {seconds:.3f}s, {per_match:.2f}us per '
+                                  u'match'.format(show_values=show_values, matches=matches, seconds=seconds,
+                                                  per_match=seconds / matches * 1e6))
+                results.append({'show_values': show_values, 'matches': matches, 'seconds': seconds})
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({'results': results}, output, indent=2, sort_keys=True)
+
+    def get_grepdb_command(self):
+        """Returns a grepdb command set up to highlight PATTERN, with colours so that each match is wrapped"""
+        command = GrepdbCommand(stdout=StringIO())
+        command.raw_args = [PATTERN]
+        options = vars(command.create_parser('', 'grepdb').parse_args([PATTERN]))
+        command.configure(options)
+        return command
+
+    def time(self, command, text, show_values):
+        start = time.time()
+        command.get_snippet(text, show_values)
+        return time.time() - start
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import datetime
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0002_testmodelwithstr'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testmodelwithstr',
+            name='updated_at',
+            field=models.DateTimeField(default=datetime.datetime(2016, 1, 1, 0, 0), auto_now=True),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0003_testmodelwithstr_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestModelWithRelatedStr',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('text_field', models.TextField(blank=True)),
+                ('parent', models.ForeignKey(related_name='children', to='tests.TestModelWithStr')),
+            ],
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils.encoding import python_2_unicode_compatible
 
 
 class TestModel(models.Model):
@@ -17,3 +18,29 @@ class TestModelTwo(models.Model):
 
     class Meta:
         app_label = 'tests'
+
+
+@python_2_unicode_compatible
+class TestModelWithStr(models.Model):
+    name = models.CharField(blank=True, max_length=255)
+    text_field = models.TextField(blank=True)
+    char_field = models.CharField(blank=True, max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'tests'
+
+    def __str__(self):
+        return self.name
+
+
+@python_2_unicode_compatible
+class TestModelWithRelatedStr(models.Model):
+    parent = models.ForeignKey(TestModelWithStr, related_name='children')
+    text_field = models.TextField(blank=True)
+
+    class Meta:
+        app_label = 'tests'
+
+    def __str__(self):
+        return u'{name} child'.format(name=self.parent.name)
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 from django.conf import settings
 from django.core.management import call_command, CommandError
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils.six import StringIO
 
 from models import TestModel
@@ -118,6 +120,22 @@ class TestWithAdminInstalled(TestCase):
                    "\x1b[32mhttps://dev.example.com/admin/tests/testmodel/1/\x1b[0m\n"
         self.assertEqual(out.getvalue(), expected)
 
+    def test_links_for_multiple_matches_without_extra_queries(self):
+        TestModel.objects.create(text_field="The quick red fox")
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('grepdb', 'quick', 'tests.TestModel.text_field', '-s', '-l', 'production', 'staging',
+                         stdout=out)
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> " \
+                   "text_field\x1b[0m\n\x1b[1m\x1b[32mTestModel object (pk=1)\x1b[0m\n" \
+                   "\x1b[32mhttps://example.com/admin/tests/testmodel/1/\x1b[0m\n" \
+                   "\x1b[32mhttps://staging.example.com/admin/tests/testmodel/1/\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mTestModel object (pk=2)\x1b[0m\n" \
+                   "\x1b[32mhttps://example.com/admin/tests/testmodel/2/\x1b[0m\n" \
+                   "\x1b[32mhttps://staging.example.com/admin/tests/testmodel/2/\x1b[0m\n"
+        self.assertEqual(out.getvalue(), expected)
+        self.assertEqual(len(queries), 1)
+
     @override_settings()
     def test_option_without_sites_setting(self):
         del settings.DJANGO_GREPDB_SITES
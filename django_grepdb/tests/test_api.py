@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import time
+
+from django.core.management import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .. import search
+from ..api import Match, SearchTimeout
+from models import TestModel, TestModelTwo
+
+
+class TestSearch(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.one = TestModel.objects.create(text_field="The quick brown fox", text_field_two="The lazy brown dog")
+        cls.two = TestModel.objects.create(text_field="The fox and the cat\nwere not lazy")
+        cls.three = TestModelTwo.objects.create(text_field="A brown cow")
+
+    def get_matches(self, *args, **options):
+        return [(match.model, match.field, match.pk) for match in search(*args, **options)]
+
+    def test_matches(self):
+        self.assertEqual(self.get_matches('brown', ['tests.TestModel', 'tests.TestModelTwo']), [
+            (TestModel, 'text_field', self.one.pk),
+            (TestModel, 'text_field_two', self.one.pk),
+            (TestModelTwo, 'text_field', self.three.pk),
+        ])
+
+    def test_single_scan(self):
+        self.assertEqual(self.get_matches('lazy', ['tests.TestModel'], single_scan=True), [
+            (TestModel, 'text_field_two', self.one.pk),
+            (TestModel, 'text_field', self.two.pk),
+        ])
+        self.assertEqual(self.get_matches('lazy', ['tests.TestModel'], single_scan=True, pks_only=True), [
+            (TestModel, 'text_field_two', self.one.pk),
+            (TestModel, 'text_field', self.two.pk),
+        ])
+
+    def test_match_record(self):
+        match = next(search('c.t', ['tests.TestModel.text_field'], ignore_case=True))
+        self.assertEqual(match.instance, self.two)
+        self.assertEqual(match.database, 'default')
+        self.assertEqual(match.value, "The fox and the cat\nwere not lazy")
+        self.assertEqual(match.spans, [(16, 19)])
+        self.assertEqual(match.patterns, ['c.t'])
+        self.assertEqual(match.snippet(), 'The fox and the cat')
+        self.assertEqual(match.snippet(3), 'he cat\nwe')
+        self.assertEqual(repr(match), '<Match: tests.testmodel.text_field (pk={pk})>'.format(pk=self.two.pk))
+        self.assertFalse(hasattr(match, '__dict__'))
+
+    def test_pks_only(self):
+        match = next(search('cow', ['tests.TestModelTwo'], pks_only=True))
+        self.assertEqual((match.pk, match.instance, match.value, match.spans), (self.three.pk, None, None, []))
+
+    def test_multiple_patterns(self):
+        matches = search(None, ['tests.TestModel.text_field'], patterns=['quick', 'cat'])
+        self.assertEqual([match.patterns for match in matches], [['quick'], ['cat']])
+
+    def test_limits(self):
+        self.assertEqual(len(self.get_matches('brown', ['tests.TestModel', 'tests.TestModelTwo'], max_total=2)), 2)
+
+    def test_lazy(self):
+        with CaptureQueriesContext(connection) as queries:
+            matches = search('brown', ['tests.TestModel', 'tests.TestModelTwo'])
+            self.assertEqual(len(queries), 0)
+            next(matches)
+            self.assertEqual(len(queries), 1)
+
+    @override_settings(DJANGO_GREPDB_PRESETS={'cows': {'identifiers': ['tests.TestModelTwo']}})
+    def test_preset(self):
+        self.assertEqual(self.get_matches('brown', preset='cows'), [(TestModelTwo, 'text_field', self.three.pk)])
+
+    def test_options_are_checked(self):
+        with self.assertRaises(CommandError) as cm:
+            search('brown', ['tests.TestModel'], count=True)
+        self.assertEqual(cm.exception.message, "search() yields each match, so count and format can't be used with it")
+        with self.assertRaises(LookupError):
+            search('brown', ['tests.NoSuchModel'])
+
+    def test_match_slots(self):
+        self.assertEqual(Match.__slots__,
+                         ('model', 'field', 'pk', 'instance', 'database', '_command', '_query_index'))
+
+    def test_after(self):
+        matches = list(search('brown', ['tests.TestModel', 'tests.TestModelTwo'], stream=True))
+        self.assertEqual([match.cursor for match in matches],
+                         ['0:{pk}'.format(pk=self.one.pk), '1:{pk}'.format(pk=self.one.pk),
+                          '2:{pk}'.format(pk=self.three.pk)])
+        self.assertEqual(self.get_matches('brown', ['tests.TestModel', 'tests.TestModelTwo'], stream=True,
+                                          after=matches[0].cursor),
+                         [(TestModel, 'text_field_two', self.one.pk), (TestModelTwo, 'text_field', self.three.pk)])
+        self.assertEqual(self.get_matches('brown', ['tests.TestModel', 'tests.TestModelTwo'], stream=True,
+                                          after=matches[2].cursor), [])
+
+    def test_deadline(self):
+        matches = search('brown', ['tests.TestModel', 'tests.TestModelTwo'], stream=True, deadline=time.time() - 1)
+        with self.assertRaises(SearchTimeout) as cm:
+            next(matches)
+        self.assertEqual(cm.exception.cursor, '0:')
+        cursor = '1:{pk}'.format(pk=self.one.pk)
+        matches = search('brown', ['tests.TestModel', 'tests.TestModelTwo'], stream=True, after=cursor,
+                         deadline=time.time() - 1)
+        with self.assertRaises(SearchTimeout) as cm:
+            next(matches)
+        self.assertEqual(cm.exception.cursor, cursor)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(CommandError) as cm:
+            search('brown', ['tests.TestModel'], after='nonsense')
+        self.assertEqual(cm.exception.message, 'Invalid cursor: nonsense')
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+from django.core.management import call_command, CommandError
+from django.test import TestCase, override_settings
+from django.utils.six import StringIO
+
+from ..backends import FullTextBackend, SimilarityBackend, register_lookup, FullTextLookup, SimilarityLookup
+from ..management.commands.grepdb import Command
+from models import TestModel
+
+
+class TestBackends(TestCase):
+    def test_fulltext_lookup(self):
+        register_lookup(FullTextLookup)
+        query = str(TestModel.objects.filter(text_field__grepdb_fulltext='lazy dog').query)
+        self.assertIn('to_tsvector(english::regconfig, "tests_testmodel"."text_field") @@ '
+                      'plainto_tsquery(english::regconfig, lazy dog)', query)
+
+    @override_settings(DJANGO_GREPDB_SEARCH_CONFIG='simple')
+    def test_fulltext_lookup_config(self):
+        register_lookup(FullTextLookup)
+        query = str(TestModel.objects.filter(char_field__grepdb_fulltext='dog').query)
+        self.assertIn('to_tsvector(simple::regconfig, "tests_testmodel"."char_field")', query)
+
+    def test_similarity_lookup(self):
+        register_lookup(SimilarityLookup)
+        query = str(TestModel.objects.filter(text_field__grepdb_similar='lazy dog').query)
+        self.assertIn('lazy dog <% "tests_testmodel"."text_field"', query)
+
+    def test_highlight_pattern(self):
+        for backend in (FullTextBackend(), SimilarityBackend()):
+            self.assertEqual(backend.get_highlight_pattern('lazy dog'), r'\b(?:lazy|dog)\w*')
+            self.assertEqual(backend.get_highlight_pattern('?!'), r'\?\!')
+            self.assertTrue(backend.ignores_case(False))
+
+    def test_single_scan_field_matches(self):
+        command = Command(stdout=StringIO())
+        command.raw_args = ['running', 'tests.TestModel', '--backend', 'fulltext', '--single-scan']
+        identifiers = command.configure(vars(command.create_parser('', 'grepdb').parse_args(command.raw_args)))
+        # the query is only built, not run, so can be built for PostgreSQL on any database
+        command.get_vendor = lambda query: 'postgresql'
+        query = command.get_queries(identifiers)[0]
+        results = command.get_database_results(query, command.search(query))
+        self.assertIn('CASE WHEN to_tsvector(english::regconfig, "tests_testmodel"."text_field")', str(results.query))
+        # "runs" is a form of "running" to the database, though not to the highlight pattern
+        result = TestModel(text_field='He runs', text_field_two='A running dog')
+        result.grepdb_text_field, result.grepdb_text_field_two = 1, 0
+        self.assertTrue(command.field_matches(result, 'text_field'))
+        self.assertFalse(command.field_matches(result, 'text_field_two'))
+
+    def test_postgresql_only(self):
+        for backend in ('fulltext', 'similarity'):
+            with self.assertRaises(CommandError) as cm:
+                call_command('grepdb', 'lazy dog', 'tests.TestModel', '--backend', backend, stdout=StringIO())
+            msg = '--backend {backend} is only supported on postgresql databases, not sqlite'.format(backend=backend)
+            self.assertEqual(cm.exception.message, msg)
+
+
+@override_settings(
+    DJANGO_GREPDB_PRESETS={
+        'model_one': {'identifiers': ['tests.TestModel']},
+        'model_two': {'identifiers': ['tests.TestModelTwo.char_field']},
+    }
+)
+class TestPgIndexes(TestCase):
+    def test_trigram_indexes(self):
+        out = StringIO()
+        call_command('grepdb_pg_indexes', '--print', stdout=out)
+        expected = 'CREATE EXTENSION IF NOT EXISTS pg_trgm;\n' \
+                   'CREATE INDEX CONCURRENTLY IF NOT EXISTS "grepdb_tests_testmodel_text_field_trigram" ON ' \
+                   '"tests_testmodel" USING gin ("text_field" gin_trgm_ops);\n' \
+                   'CREATE INDEX CONCURRENTLY IF NOT EXISTS "grepdb_tests_testmodel_text_field_two_trigram" ON ' \
+                   '"tests_testmodel" USING gin ("text_field_two" gin_trgm_ops);\n' \
+                   'CREATE INDEX CONCURRENTLY IF NOT EXISTS "grepdb_tests_testmodeltwo_char_field_trigram" ON ' \
+                   '"tests_testmodeltwo" USING gin ("char_field" gin_trgm_ops);\n'
+        self.assertEqual(out.getvalue(), expected)
+
+    def test_fulltext_indexes_for_preset(self):
+        out = StringIO()
+        call_command('grepdb_pg_indexes', 'model_two', '--kind', 'fulltext', '--print', stdout=out)
+        expected = 'CREATE INDEX CONCURRENTLY IF NOT EXISTS "grepdb_tests_testmodeltwo_char_field_fulltext" ON ' \
+                   '"tests_testmodeltwo" USING gin (to_tsvector(\'english\'::regconfig, "char_field"));\n'
+        self.assertEqual(out.getvalue(), expected)
+
+    @override_settings(DJANGO_GREPDB_SEARCH_CONFIG="english'::regconfig, x)); DROP TABLE x; --")
+    def test_invalid_search_config(self):
+        with self.assertRaises(CommandError) as cm:
+            call_command('grepdb_pg_indexes', '--kind', 'fulltext', '--print', stdout=StringIO())
+        self.assertTrue(cm.exception.message.startswith('DJANGO_GREPDB_SEARCH_CONFIG "english\''))
+        self.assertTrue(cm.exception.message.endswith('" is not the name of a search configuration'))
+
+    @override_settings(DJANGO_GREPDB_SEARCH_CONFIG='public.english')
+    def test_qualified_search_config(self):
+        out = StringIO()
+        call_command('grepdb_pg_indexes', 'model_two', '--kind', 'fulltext', '--print', stdout=out)
+        self.assertIn("to_tsvector('public.english'::regconfig", out.getvalue())
+
+    def test_only_postgresql(self):
+        with self.assertRaises(CommandError) as cm:
+            call_command('grepdb_pg_indexes', stdout=StringIO())
+        self.assertEqual(cm.exception.message, 'Indexes can only be created on PostgreSQL databases, not sqlite')
+
+    def test_unknown_preset(self):
+        with self.assertRaises(CommandError) as cm:
+            call_command('grepdb_pg_indexes', 'missing', '--print', stdout=StringIO())
+        self.assertEqual(cm.exception.message, 'No fields to index: no matching presets in DJANGO_GREPDB_PRESETS')
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.six import StringIO
+
+from models import TestModel
+
+
+class TestBenchmark(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_results(self):
+        path = os.path.join(self.directory, 'results.json')
+        out = StringIO()
+        call_command('grepdb_benchmark', '--rows', '20', '--density', '0.5', '--repeat', '2', '--no-test-database',
+                     '--scenario', '{pattern} tests.TestModel.text_field', '--scenario', '{pattern} tests.TestModel '
+                     '--count', '--output', path, stdout=out)
+        with open(path) as f:
+            results = json.load(f)
+        self.assertEqual(results['config']['rows'], 20)
+        self.assertEqual([result['args'] for result in results['results']], [
+            ['custom_template_tag.*%}', 'tests.TestModel.text_field', '--database', 'default'],
+            ['custom_template_tag.*%}', 'tests.TestModel', '--count', '--database', 'default'],
+        ])
+        result = results['results'][0]
+        self.assertEqual(len(result['all_seconds']), 2)
+        self.assertEqual(result['queries'], 1)
+        self.assertGreater(result['rows'], 0)
+        self.assertEqual(sorted(result['phases']), ['highlight', 'links', 'materialisation', 'query', 'title', 'write'])
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+        # the corpus is rolled back
+        self.assertFalse(TestModel.objects.exists())
+
+    def test_highlight_results(self):
+        path = os.path.join(self.directory, 'results.json')
+        out = StringIO()
+        call_command('grepdb_highlight_benchmark', '--matches', '10', '--matches', '20', '--show-values', 'a',
+                     '--show-values', '5', '--repeat', '1', '--output', path, stdout=out)
+        with open(path) as f:
+            results = json.load(f)
+        self.assertEqual([(result['show_values'], result['matches']) for result in results['results']],
+                         [('a', 10), ('a', 20), (5, 10), (5, 20)])
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
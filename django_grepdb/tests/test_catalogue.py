@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management import CommandError
+from django.test import TestCase, override_settings
+from django.utils.six import StringIO
+
+from ..catalogue import get_catalogue, get_catalogue_key, get_migration_files
+from ..management import call_command
+from models import TestModel, TestModelTwo, TestModelWithStr
+
+
+class TestAllModels(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TestModel.objects.create(text_field="The quick brown fox", char_field="brown")
+        TestModelTwo.objects.create(text_field="A brown cow")
+        TestModelWithStr.objects.create(text_field="Not here")
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.catalogue_file = os.path.join(self.directory, 'catalogue.json')
+        catalogue_settings = override_settings(DJANGO_GREPDB_CATALOGUE_FILE=self.catalogue_file)
+        catalogue_settings.enable()
+        self.addCleanup(catalogue_settings.disable)
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def grep(self, *args):
+        out = StringIO()
+        call_command('grepdb', 'brown', '--all-models', '--count', *args, stdout=out)
+        return out.getvalue()
+
+    def test_all_models(self):
+        self.assertEqual(self.grep(), 'tests.testmodel text_field: 1\ntests.testmodel text_field_two: 0\n'
+                                      'tests.testmodeltwo text_field: 1\ntests.testmodelwithstr text_field: 0\n'
+                                      'tests.testmodelwithrelatedstr text_field: 0\n')
+
+    def test_field_types(self):
+        self.assertEqual(self.grep('-c', '--app', 'tests'),
+                         'tests.testmodel char_field: 1\ntests.testmodeltwo char_field: 0\ntests.testmodeltwo url: 0\n'
+                         'tests.testmodelwithstr name: 0\ntests.testmodelwithstr char_field: 0\n')
+
+    def test_apps(self):
+        expected = 'contenttypes.contenttype app_label: 0\ncontenttypes.contenttype model: 0\n'
+        self.assertEqual(self.grep('-c', '--app', 'contenttypes'), expected)
+        self.assertEqual(self.grep('-c', '--exclude-app', 'tests'), expected)
+
+    def test_index_is_not_searched(self):
+        self.assertEqual(self.grep('-c', '--app', 'grepdb_index'), '')
+        self.assertNotIn('grepdb_index', self.grep('-c'))
+
+    def test_catalogue_is_cached(self):
+        self.grep()
+        with open(self.catalogue_file) as f:
+            cache = json.load(f)
+        self.assertEqual(cache['key'], get_catalogue_key())
+        self.assertIn(['tests.TestModelTwo', ['text_field']], cache['catalogues']['TextField'])
+        # the cached catalogue is used as long as the key is the same
+        cache['catalogues']['TextField'] = [['tests.TestModelTwo', ['char_field']]]
+        with open(self.catalogue_file, 'w') as f:
+            json.dump(cache, f)
+        self.assertEqual(get_catalogue(['TextField']), [(TestModelTwo, ['char_field'])])
+
+    def test_catalogue_is_rebuilt(self):
+        with open(self.catalogue_file, 'w') as f:
+            json.dump({'key': 'old', 'catalogues': {'TextField': [['tests.TestModelTwo', ['char_field']]]}}, f)
+        self.assertIn((TestModelTwo, ['text_field']), get_catalogue(['TextField']))
+        with override_settings(MIGRATION_MODULES={'tests': 'elsewhere'}):
+            self.assertNotEqual(get_catalogue_key(), json.load(open(self.catalogue_file))['key'])
+
+    def test_edited_migrations_change_the_key(self):
+        path = os.path.join(self.directory, '0001_initial.py')
+        with open(path, 'w') as f:
+            f.write('operations = []\n')
+        migrations = get_migration_files(self.directory)
+        self.assertEqual([name for name, mtime, size in migrations], ['0001_initial.py'])
+        with open(path, 'a') as f:
+            f.write('# edited\n')
+        self.assertNotEqual(get_migration_files(self.directory), migrations)
+        self.assertEqual(get_migration_files(os.path.join(self.directory, 'missing')), [])
+
+    def test_no_cache(self):
+        with override_settings(DJANGO_GREPDB_CATALOGUE_FILE=None):
+            self.assertIn((TestModel, ['text_field', 'text_field_two']), get_catalogue(['TextField']))
+        self.assertFalse(os.path.exists(self.catalogue_file))
+        with self.settings():
+            del settings.DJANGO_GREPDB_CATALOGUE_FILE
+            self.assertIn((TestModel, ['text_field', 'text_field_two']), get_catalogue(['TextField']))
+
+    def test_unwritable_cache(self):
+        with override_settings(DJANGO_GREPDB_CATALOGUE_FILE=os.path.join(self.directory, 'missing', 'cache.json')):
+            self.assertIn((TestModel, ['text_field', 'text_field_two']), get_catalogue(['TextField']))
+
+    def test_identifiers_are_not_allowed(self):
+        with self.assertRaises(CommandError) as cm:
+            call_command('grepdb', 'brown', 'tests.TestModel', '--all-models', stdout=StringIO())
+        self.assertEqual(cm.exception.message,
+                         "Identifiers can't be given with --all-models: use --app to limit the models")
+
+    def test_apps_need_all_models(self):
+        with self.assertRaises(CommandError) as cm:
+            call_command('grepdb', 'brown', 'tests.TestModel', '--app', 'tests', stdout=StringIO())
+        self.assertEqual(cm.exception.message, '--app and --exclude-app can only be used with --all-models')
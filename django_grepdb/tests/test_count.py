@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from models import TestModel
+
+
+class TestCount(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.one = TestModel.objects.create(text_field="The quick brown fox",
+                                           text_field_two="jumped over the lazy brown dog")
+        cls.two = TestModel.objects.create(text_field="The fox and the cat were not lazy")
+        cls.three = TestModel.objects.create(text_field_two="The CAT was not lazy")
+
+    def grep(self, *args):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('grepdb', *args, stdout=out)
+        return out.getvalue(), queries
+
+    def test_count(self):
+        out, queries = self.grep('lazy', 'tests.TestModel', '--count')
+        self.assertEqual(out, 'tests.testmodel text_field: 1\ntests.testmodel text_field_two: 2\n')
+        self.assertEqual(len(queries), 2)
+        self.assertIn('COUNT(*)', queries[0]['sql'])
+
+    def test_count_single_scan(self):
+        out, queries = self.grep('brown', 'tests.TestModel', '--count', '--single-scan')
+        self.assertEqual(out, 'tests.testmodel text_field: 1\ntests.testmodel text_field_two: 1\n')
+        self.assertEqual(len(queries), 1)
+        self.assertIn('CASE WHEN', queries[0]['sql'])
+
+    def test_pks_only(self):
+        out, queries = self.grep('lazy', 'tests.TestModel', '--pks-only')
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field\x1b[0m\n{two}\n" \
+                   "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field_two\x1b[0m\n" \
+                   "{one}\n{three}\n"
+        self.assertEqual(out, expected.format(one=self.one.pk, two=self.two.pk, three=self.three.pk))
+        self.assertIn('SELECT "tests_testmodel"."id" FROM', queries[0]['sql'])
+
+    def test_pks_only_single_scan(self):
+        for args in [('lazy',), ('cat', '-i'), ('lazy', '--stream', '--chunk-size', '3')]:
+            out, queries = self.grep(args[0], 'tests.TestModel', '--pks-only', *args[1:])
+            single_scan_out, queries = self.grep(args[0], 'tests.TestModel', '--pks-only', '--single-scan', *args[1:])
+            self.assertEqual(out, single_scan_out)
+        # streamed results are grouped by field a chunk at a time
+        out, queries = self.grep('lazy', 'tests.TestModel', '--pks-only', '--single-scan', '--stream', '--chunk-size',
+                                 '1', '--no-color')
+        expected = "\n<class 'django_grepdb.tests.models.TestModel'> text_field_two\n{one}\n" \
+                   "\n<class 'django_grepdb.tests.models.TestModel'> text_field\n{two}\n" \
+                   "\n<class 'django_grepdb.tests.models.TestModel'> text_field_two\n{three}\n"
+        self.assertEqual(out, expected.format(one=self.one.pk, two=self.two.pk, three=self.three.pk))
+
+    def test_modes_are_exclusive(self):
+        with self.assertRaises(CommandError):
+            self.grep('lazy', 'tests.TestModel', '--pks-only', '--count')
+        with self.assertRaises(CommandError) as cm:
+            self.grep('lazy', 'tests.TestModel', '--count', '--format', 'csv')
+        self.assertEqual(cm.exception.message, '--count and --pks-only can only be used with --format text')
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+from django.core.management import call_command, CommandError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils.six import StringIO
+
+from models import TestModel, TestModelTwo
+from utils import threads_share_test_databases
+
+
+class TestModelTwoOnDefaultRouter(object):
+    """Only keeps TestModelTwo in the default database"""
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if model_name == 'testmodeltwo':
+            return db == 'default'
+        return None
+
+
+class TestDatabases(TestCase):
+    multi_db = True
+
+    @classmethod
+    def setUpTestData(cls):
+        TestModel.objects.create(text_field="The quick brown fox")
+        TestModel.objects.db_manager('other').create(text_field="The slow brown dog")
+        TestModel.objects.db_manager('other').create(text_field="The slow brown fox")
+
+    def test_default_database_by_default(self):
+        out = StringIO()
+        call_command('grepdb', 'slow', 'tests.TestModel', '-s', stdout=out)
+        self.assertEqual(out.getvalue(), "")
+
+    def test_database_option(self):
+        out = StringIO()
+        call_command('grepdb', 'slow', 'tests.TestModel', '-s', '--database', 'other', stdout=out)
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field [other]\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mTestModel object (pk=1)\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mTestModel object (pk=2)\x1b[0m\n"
+        self.assertEqual(out.getvalue(), expected)
+
+    def test_multiple_database_options(self):
+        out = StringIO()
+        call_command('grepdb', 'fox', 'tests.TestModel', '-s', '--database', 'other', '--database', 'default',
+                     '--jobs', '1', stdout=out)
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field [other]\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mTestModel object (pk=2)\x1b[0m\n" \
+                   "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field [default]\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mTestModel object (pk=1)\x1b[0m\n"
+        self.assertEqual(out.getvalue(), expected)
+
+    def test_all_databases(self):
+        out = StringIO()
+        call_command('grepdb', 'brown', 'tests.TestModel', '-s', '--all-databases', '--jobs', '1', stdout=out)
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field [default]\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mTestModel object (pk=1)\x1b[0m\n" \
+                   "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field [other]\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mTestModel object (pk=1)\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mTestModel object (pk=2)\x1b[0m\n"
+        self.assertEqual(out.getvalue(), expected)
+
+    @override_settings(DATABASE_ROUTERS=['django_grepdb.tests.test_databases.TestModelTwoOnDefaultRouter'])
+    def test_all_databases_follows_routers(self):
+        TestModelTwo.objects.create(text_field="A brown cow")
+        out = StringIO()
+        call_command('grepdb', 'brown', 'tests.TestModel.text_field', 'tests.TestModelTwo', '--all-databases',
+                     '--jobs', '1', '--count', stdout=out)
+        self.assertEqual(out.getvalue(), 'tests.testmodel text_field [default]: 1\n'
+                                         'tests.testmodeltwo text_field [default]: 1\n'
+                                         'tests.testmodel text_field [other]: 2\n')
+        # databases named with --database are searched whatever the routers say, as they may be replicas
+        out = StringIO()
+        call_command('grepdb', 'brown', 'tests.TestModelTwo', '--database', 'other', '--count', stdout=out)
+        self.assertEqual(out.getvalue(), 'tests.testmodeltwo text_field [other]: 0\n')
+
+    def test_unknown_database(self):
+        with self.assertRaises(CommandError) as cm:
+            call_command('grepdb', 'brown', 'tests.TestModel', '--database', 'replica')
+        self.assertEqual(cm.exception.message, u'Database "replica" is not configured in settings.DATABASES')
+
+
+class TestDatabasesInParallel(TransactionTestCase):
+    multi_db = True
+
+    def setUp(self):
+        if not threads_share_test_databases():
+            self.skipTest("Each thread gets a separate in-memory SQLite database with these settings")
+        TestModel.objects.create(text_field="The quick brown fox")
+        TestModel.objects.db_manager('other').create(text_field="The slow brown dog")
+
+    def test_databases_searched_in_parallel_by_default(self):
+        out, sequential_out = StringIO(), StringIO()
+        call_command('grepdb', 'brown', 'tests.TestModel', '-sa', '--all-databases', stdout=out)
+        call_command('grepdb', 'brown', 'tests.TestModel', '-sa', '--all-databases', '-j', '1', stdout=sequential_out)
+        self.assertEqual(out.getvalue(), sequential_out.getvalue())
+        self.assertIn("slow", out.getvalue())
+        self.assertIn("quick", out.getvalue())
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from models import TestModel, TestModelWithStr
+
+
+class TestDeferredLoading(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TestModel.objects.create(text_field="The quick brown fox", text_field_two="jumped over the lazy dog",
+                                 char_field="A fox")
+        TestModelWithStr.objects.create(name="Fox", text_field="The quick brown fox", char_field="A fox")
+
+    def get_sql(self, *args):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('grepdb', *args, stdout=out)
+        return out.getvalue(), ' '.join(query['sql'] for query in queries)
+
+    def test_only_searched_field_loaded_with_default_str(self):
+        out, sql = self.get_sql('brown', 'tests.TestModel.text_field', '-s')
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mTestModel object (pk=1)\x1b[0m\n"
+        self.assertEqual(out, expected)
+        self.assertIn('"text_field"', sql)
+        self.assertNotIn('"text_field_two"', sql)
+        self.assertNotIn('"char_field"', sql)
+
+    def test_whole_row_loaded_with_custom_str(self):
+        out, sql = self.get_sql('brown', 'tests.TestModelWithStr.text_field', '-s')
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModelWithStr'> text_field\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mFox (pk=1)\x1b[0m\n"
+        self.assertEqual(out, expected)
+        self.assertIn('"char_field"', sql)
+
+    @override_settings(DJANGO_GREPDB_STR_FIELDS={'tests.TestModelWithStr': ['name']})
+    def test_str_fields_from_settings(self):
+        out, sql = self.get_sql('brown', 'tests.TestModelWithStr.text_field', '-s')
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModelWithStr'> text_field\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mFox (pk=1)\x1b[0m\n"
+        self.assertEqual(out, expected)
+        self.assertIn('"name"', sql)
+        self.assertNotIn('"char_field"', sql)
+        # no extra queries to load deferred fields
+        self.assertEqual(sql.count('SELECT'), 1)
+
+    @override_settings(DJANGO_GREPDB_STR_FIELDS=['tests.TestModelWithStr'])
+    def test_misconfigured_str_fields_setting(self):
+        with self.assertRaises(CommandError) as cm:
+            call_command('grepdb', 'brown', 'tests.TestModelWithStr.text_field')
+        self.assertEqual(cm.exception.message, u'DJANGO_GREPDB_STR_FIELDS is not a dict-like object')
+
+    def test_no_str(self):
+        out, sql = self.get_sql('brown', 'tests.TestModelWithStr.text_field', '-s', '--no-str')
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModelWithStr'> text_field\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mTestModelWithStr (pk=1)\x1b[0m\n"
+        self.assertEqual(out, expected)
+        self.assertNotIn('"name"', sql)
+        self.assertNotIn('"char_field"', sql)
+
+    def test_single_scan_loads_all_searched_fields(self):
+        out, sql = self.get_sql('fox', 'tests.TestModel', '-c', '-t', '-s', '--single-scan')
+        self.assertIn('"text_field_two"', sql)
+        self.assertIn('"char_field"', sql)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from ..engine import match_rows
+from models import TestModel, TestModelWithStr
+
+
+class TestPythonEngine(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TestModel.objects.create(text_field="The quick brown fox", text_field_two="jumped over the lazy brown dog")
+        TestModel.objects.create(text_field="The fox and the cat were not lazy")
+        TestModel.objects.create(text_field_two="The CAT was not lazy\nand the fox was quick")
+
+    def grep(self, *args):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('grepdb', *args, stdout=out)
+        return out.getvalue(), queries
+
+    def test_output_matches_database_engine(self):
+        for args in [('lazy', '-s'), ('cat', '-s', '-i'), ('l.zy', '-sa'), ('^The', '-s2'), ('fox$', '--single-scan'),
+                     ('quick', '--pks-only'), ('cat', '-i', '--pks-only', '--single-scan'), ('o', '--count'),
+                     ('lazy', '--count', '--single-scan'), ('o', '--max-count', '1'), ('lazy', '--format', 'jsonl')]:
+            out, queries = self.grep(args[0], 'tests.TestModel', *args[1:])
+            python_out, queries = self.grep(args[0], 'tests.TestModel', '--engine', 'python', *args[1:])
+            self.assertEqual(out, python_out)
+
+    def test_only_searched_fields_are_read(self):
+        out, queries = self.grep('brown', 'tests.TestModel.text_field', '--engine', 'python', '--pks-only')
+        self.assertEqual(len(queries), 1)
+        self.assertIn('SELECT "tests_testmodel"."id", "tests_testmodel"."text_field" FROM', queries[0]['sql'])
+        self.assertIn('LIKE', queries[0]['sql'])
+        self.assertNotIn('REGEXP', queries[0]['sql'])
+
+    def test_chunks(self):
+        out, queries = self.grep('lazy', 'tests.TestModel.text_field_two', '--engine', 'python', '--chunk-size', '1',
+                                 '--pks-only')
+        # a query for each of the two rows containing the literal, and one more to find there are no more
+        self.assertEqual(len(queries), 3)
+
+    def test_processes(self):
+        out, queries = self.grep('lazy', 'tests.TestModel', '-s')
+        python_out, queries = self.grep('lazy', 'tests.TestModel', '-s', '--engine', 'python', '--jobs', '2',
+                                        '--chunk-size', '1')
+        self.assertEqual(out, python_out)
+
+    def test_match_rows(self):
+        rows = [(1, u'The quick brown fox', None), (2, u'lazy', u'The Fox'), (3, u'dog', u'cat')]
+        self.assertEqual(match_rows('fox', 0, rows), [(1, [True, False])])
+        self.assertEqual(match_rows('fox', 2, rows), [(1, [True, False]), (2, [False, True])])
+
+    def test_fields_which_are_not_text(self):
+        TestModelWithStr.objects.create(name="brown")
+        for args in [('-f', 'AutoField', '--count'), ('-f', 'DateTimeField', '--count'), ('-f', 'AutoField', '-s')]:
+            out, queries = self.grep('^[0-9]', 'tests.TestModelWithStr', *args)
+            python_out, queries = self.grep('^[0-9]', 'tests.TestModelWithStr', '--engine', 'python', *args)
+            self.assertEqual(out, python_out)
+            self.assertNotIn(': 0', python_out)
+        self.assertEqual(match_rows('^4', 0, [(1, 42, None), (2, 24, u'4')]), [(1, [True, False]), (2, [False, True])])
+
+    def test_only_regex_backend(self):
+        with self.assertRaises(CommandError) as cm:
+            self.grep('lazy', 'tests.TestModel', '--engine', 'python', '--backend', 'fulltext')
+        self.assertEqual(cm.exception.message, '--engine python can only be used with --backend regex')
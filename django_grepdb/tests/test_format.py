@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import json
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.encoding import force_text
+from django.utils.six import StringIO
+
+from models import TestModel
+
+
+class TestFormat(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.obj = TestModel.objects.create(text_field=u"The quick brown fox\nand the fox, café")
+
+    def grep(self, *args, **options):
+        out = StringIO()
+        call_command('grepdb', 'fox', 'tests.TestModel', *args, stdout=out, **options)
+        return force_text(out.getvalue())
+
+    def test_jsonl(self):
+        out = self.grep('--format', 'jsonl')
+        self.assertEqual(json.loads(out), {
+            'model': 'tests.testmodel',
+            'field': 'text_field',
+            'pk': self.obj.pk,
+            'database': 'default',
+            'admin_urls': [],
+            'spans': [[16, 19], [28, 31]],
+            'snippet': u'The quick brown fox\n\nand the fox, café',
+            'patterns': ['fox'],
+        })
+        self.assertEqual(out.count('\n'), 1)
+
+    def test_csv(self):
+        out = self.grep('--format', 'csv', '-s', '3')
+        expected = u'model,field,pk,database,admin_urls,spans,snippet,patterns\n' \
+                   u'tests.testmodel,text_field,{pk},default,,16-19 28-31,"wn fox\nan\nhe fox, c",fox\n'
+        self.assertEqual(out, expected.format(pk=self.obj.pk))
+
+    def test_tsv(self):
+        out = self.grep('--format', 'tsv', '-s', 'a')
+        expected = u'model\tfield\tpk\tdatabase\tadmin_urls\tspans\tsnippet\tpatterns\n' \
+                   u'tests.testmodel\ttext_field\t{pk}\tdefault\t\t16-19 28-31\t' \
+                   u'"The quick brown fox\nand the fox, café"\tfox\n'
+        self.assertEqual(out, expected.format(pk=self.obj.pk))
+
+    def test_no_color(self):
+        out = self.grep(no_color=True)
+        expected = u"\n<class 'django_grepdb.tests.models.TestModel'> text_field\nTestModel object (pk={pk})\n" \
+                   u"The quick brown fox\n\nand the fox, café\n\n"
+        self.assertEqual(out, expected.format(pk=self.obj.pk))
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from ..index.models import IndexedField, Trigram
+from ..index.utils import get_candidate_pks, get_trigrams
+from ..management import call_command as grepdb_call_command
+from models import TestModel, TestModelTwo
+
+
+@override_settings(
+    DJANGO_GREPDB_PRESETS={
+        'model_one': {'identifiers': ['tests.TestModel']},
+        'model_two': {'identifiers': ['tests.TestModelTwo.char_field']},
+    }
+)
+class TestIndex(TestCase):
+    multi_db = True
+
+    @classmethod
+    def setUpTestData(cls):
+        TestModel.objects.create(text_field="The quick brown fox", text_field_two="jumped over the lazy dog")
+        TestModel.objects.create(text_field="The fox and the cat were not lazy")
+        TestModelTwo.objects.create(char_field="The fox was quick and brown")
+
+    def build(self, *identifiers):
+        out = StringIO()
+        call_command('grepdb_index', *identifiers, stdout=out)
+        return out.getvalue()
+
+    def search(self, *args):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            # the one which supports presets
+            grepdb_call_command('grepdb', *args, stdout=out)
+        return out.getvalue(), queries[-1]['sql']
+
+    def test_trigrams(self):
+        self.assertEqual(get_trigrams(u'FoxEs'), {u'fox', u'oxe', u'xes'})
+        self.assertEqual(get_trigrams(u'ab'), set())
+
+    def test_build_index(self):
+        out = self.build()
+        self.assertEqual(out, "tests.testmodel text_field: 2 rows indexed\n"
+                              "tests.testmodel text_field_two: 2 rows indexed\n"
+                              "tests.testmodeltwo char_field: 1 rows indexed\n")
+        self.assertEqual(IndexedField.objects.filter(complete=True).count(), 3)
+        self.assertTrue(Trigram.objects.filter(field__field_name='text_field', object_pk='1', trigram='bro').exists())
+
+    def test_build_index_for_identifier(self):
+        out = self.build('tests.TestModel.text_field')
+        self.assertEqual(out, "tests.testmodel text_field: 2 rows indexed\n")
+
+    def test_rebuilding_replaces_postings(self):
+        self.build()
+        count = Trigram.objects.count()
+        self.build()
+        self.assertEqual(Trigram.objects.count(), count)
+
+    def test_unknown_identifier(self):
+        with self.assertRaises(CommandError) as cm:
+            self.build('tests.TestModelTwo.text_field')
+        self.assertEqual(cm.exception.message, u'tests.TestModelTwo.text_field is not in DJANGO_GREPDB_PRESETS')
+
+    def test_candidates(self):
+        self.build()
+        self.assertEqual(get_candidate_pks(TestModel, ['text_field'], ['brown']), [1])
+        self.assertEqual(sorted(get_candidate_pks(TestModel, ['text_field', 'text_field_two'], ['lazy'])), [1, 2])
+        # too short to narrow anything down, so the index isn't queried
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_candidate_pks(TestModel, ['text_field'], ['ox']))
+            self.assertIsNone(get_candidate_pks(TestModel, ['text_field'], ['fox']))
+        # not in a preset
+        self.assertIsNone(get_candidate_pks(TestModelTwo, ['text_field'], ['brown']))
+
+    def test_search_uses_index(self):
+        self.build()
+        out, sql = self.search('quick.*fox', 'tests.TestModel.text_field', '-s', '--use-index')
+        self.assertIn('"tests_testmodel"."id" IN (%s)', sql)
+        self.assertIn('TestModel object (pk=1)', out)
+
+    def test_search_without_index(self):
+        self.build()
+        # rows changed by bulk updates aren't in the index, so it's only used when asked for
+        TestModel.objects.filter(pk=2).update(text_field="The quick cat and the fox")
+        out, sql = self.search('quick.*fox', 'tests.TestModel.text_field', '-s')
+        self.assertNotIn('IN (', sql)
+        self.assertIn('TestModel object (pk=1)', out)
+        self.assertIn('TestModel object (pk=2)', out)
+
+    @override_settings(DJANGO_GREPDB_PRESETS={'indexed': {'identifiers': ['tests.TestModel.text_field'], 'use_index': True}})
+    def test_preset_uses_index(self):
+        self.build()
+        out, sql = self.search('quick.*fox', '-p', 'indexed', '-s')
+        self.assertIn('"tests_testmodel"."id" IN (%s)', sql)
+
+    def test_incomplete_index_not_used(self):
+        self.build()
+        IndexedField.objects.update(complete=False)
+        out, sql = self.search('quick.*fox', 'tests.TestModel.text_field', '-s', '--use-index')
+        self.assertNotIn('IN (', sql)
+
+    def test_index_updated_on_save_and_delete(self):
+        self.build()
+        new = TestModel.objects.create(text_field="A quick red fox")
+        self.assertEqual(sorted(get_candidate_pks(TestModel, ['text_field'], ['quick'])), [1, new.pk])
+        new.text_field = "A slow red fox"
+        new.save()
+        self.assertEqual(get_candidate_pks(TestModel, ['text_field'], ['quick']), [1])
+        self.assertEqual(get_candidate_pks(TestModel, ['text_field'], ['slow']), [new.pk])
+        new.delete()
+        self.assertEqual(get_candidate_pks(TestModel, ['text_field'], ['slow']), [])
+
+    def test_other_databases_not_indexed(self):
+        self.build()
+        other = TestModel(pk=1, text_field="The slow brown dog")
+        other.save(using='other')
+        self.assertEqual(get_candidate_pks(TestModel, ['text_field'], ['quick']), [1])
+        other.delete()
+        self.assertEqual(get_candidate_pks(TestModel, ['text_field'], ['quick']), [1])
+        out, sql = self.search('quick.*fox', 'tests.TestModel.text_field', '-s', '--use-index')
+        self.assertIn('TestModel object (pk=1)', out)
+
+
+class TestWithoutPresets(TestCase):
+    def test_build_index_fails(self):
+        with self.assertRaises(CommandError) as cm:
+            call_command('grepdb_index')
+        msg = u'No fields to index: DJANGO_GREPDB_PRESETS is not configured in settings'
+        self.assertEqual(cm.exception.message, msg)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from django.core.management import call_command, CommandError
+from django.test import SimpleTestCase, TransactionTestCase
+from django.utils.six import StringIO
+
+from ..signals import query_finished
+from models import TestModel, TestModelTwo, TestModelWithRelatedStr, TestModelWithStr
+from utils import threads_share_test_databases
+
+
+class TestJobs(TransactionTestCase):
+    """Worker threads use their own database connections, so the test data needs to be committed"""
+    def setUp(self):
+        if not threads_share_test_databases():
+            self.skipTest("Each thread gets a separate in-memory SQLite database with these settings")
+        self.brown_fox = TestModel.objects.create(text_field="The quick brown fox", text_field_two="jumped over the lazy brown dog")
+        TestModel.objects.create(text_field="The fox and the cat were not lazy")
+        TestModelTwo.objects.create(text_field="The dog was lazy", char_field="The fox was quick and brown")
+
+    def test_output_matches_sequential_run(self):
+        identifiers = ['tests.TestModel', 'tests.TestModelTwo']
+        for args in [('lazy', '-s'), ('brown', '-sa', '-c', '-t'), ('o', '-s2', '--single-scan'), ('cat', '-s'),
+                     ('lazy', '-s', '--engine', 'python')]:
+            out, jobs_out = StringIO(), StringIO()
+            call_command('grepdb', args[0], *(identifiers + list(args[1:])), stdout=out)
+            call_command('grepdb', args[0], *(identifiers + list(args[1:]) + ['--jobs', '3']), stdout=jobs_out)
+            self.assertEqual(out.getvalue(), jobs_out.getvalue())
+
+    def test_more_jobs_than_queries(self):
+        out = StringIO()
+        call_command('grepdb', 'brown', 'tests.TestModel.text_field', '-s', '-j', '8', stdout=out)
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> " \
+                   "text_field\x1b[0m\n\x1b[1m\x1b[32mTestModel object (pk={pk})\x1b[0m\n".format(pk=self.brown_fox.pk)
+        self.assertEqual(out.getvalue(), expected)
+
+    def test_render_queries_are_counted(self):
+        parent = TestModelWithStr.objects.create(name="Parent")
+        for i in range(3):
+            TestModelWithRelatedStr.objects.create(parent=parent, text_field="The quick brown fox")
+        render_queries = []
+
+        def receiver(sender, **kwargs):
+            render_queries.append(kwargs['render_queries'])
+        query_finished.connect(receiver)
+        self.addCleanup(query_finished.disconnect, receiver)
+        for jobs in ['1', '2']:
+            out, err = StringIO(), StringIO()
+            call_command('grepdb', 'fox', 'tests.TestModelWithRelatedStr', 'tests.TestModel.text_field', '-s',
+                         '--stats', '--no-auto-related', '--jobs', jobs, stdout=out, stderr=err)
+            self.assertIn('Warning: 3 of the SQL queries were run while showing the results', err.getvalue())
+        self.assertEqual(render_queries, [3, 0, 3, 0])
+
+
+class TestJobsOption(SimpleTestCase):
+    """Tests which don't run any queries in threads, so don't need test data that they can see"""
+    def test_no_queries(self):
+        out = StringIO()
+        call_command('grepdb', 'brown', '-j', '2', stdout=out)
+        self.assertEqual(out.getvalue(), "")
+
+    def test_invalid_jobs(self):
+        with self.assertRaises(CommandError) as cm:
+            call_command('grepdb', 'brown', '-j', 'x')
+        self.assertEqual(cm.exception.message, "Error: argument --jobs/-j: x is not a positive integer")
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import re
+
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from models import TestModel, TestModelTwo
+
+
+class TestLimits(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            TestModel.objects.create(text_field="The quick brown fox", text_field_two="The lazy brown dog")
+        TestModelTwo.objects.create(text_field="A brown cow")
+
+    def grep(self, *args):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('grepdb', 'brown', 'tests.TestModel', 'tests.TestModelTwo', '--pks-only', '--no-color',
+                         *args, stdout=out)
+        return out.getvalue().split('\n\n'), queries
+
+    def get_pks(self, out):
+        return [len(section.strip().split('\n')) - 1 for section in out if section]
+
+    def test_max_count(self):
+        out, queries = self.grep('--max-count', '2')
+        self.assertEqual(self.get_pks(out), [2, 2, 1])
+        self.assertEqual(len(queries), 3)
+        for query in queries:
+            self.assertIn('LIMIT 2', query['sql'])
+
+    def test_max_count_single_scan(self):
+        out, queries = self.grep('--max-count', '2', '--single-scan')
+        self.assertEqual(self.get_pks(out), [2, 2, 1])
+
+    def test_max_total(self):
+        out, queries = self.grep('--max-total', '7')
+        self.assertEqual(self.get_pks(out), [5, 2])
+        self.assertEqual(len(queries), 2)
+        self.assertIn('LIMIT 2', queries[1]['sql'])
+
+    def test_max_total_stream(self):
+        out, queries = self.grep('--max-total', '7', '--stream', '--chunk-size', '3')
+        self.assertEqual(self.get_pks(out), [5, 2])
+        # two chunks for the first field, then just the two rows still to be found for the second
+        self.assertEqual([re.search(r'LIMIT (\d+)', query['sql']).group(1) for query in queries], ['3', '3', '2'])
+
+    def test_first(self):
+        out, queries = self.grep('--first')
+        self.assertEqual(self.get_pks(out), [1])
+        self.assertEqual(len(queries), 1)
+        self.assertIn('LIMIT 1', queries[0]['sql'])
+
+    def test_since_is_not_allowed(self):
+        with self.assertRaises(CommandError) as cm:
+            self.grep('--first', '--since')
+        self.assertEqual(cm.exception.message, "--since can't be used with --max-count, --max-total or --first")
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+import tempfile
+from unittest import skipUnless
+
+from django.core.management import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from ..management import call_command
+from ..management.commands.grepdb import Command
+from ..patterns import MAX_GROUPS
+from models import TestModel
+
+
+class TestPatterns(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.one = TestModel.objects.create(text_field="The quick brown fox")
+        cls.two = TestModel.objects.create(text_field="The fox and the cat were not lazy")
+        cls.three = TestModel.objects.create(text_field="The dog was not lazy")
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def grep(self, *args):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('grepdb', *args, stdout=out)
+        return out.getvalue(), queries
+
+    def write_patterns_file(self, content):
+        path = os.path.join(self.directory, 'patterns.txt')
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_multiple_patterns(self):
+        out, queries = self.grep('-e', 'fox', '-e', 'l[a]zy', 'tests.TestModel.text_field', '--no-color')
+        expected = "\n<class 'django_grepdb.tests.models.TestModel'> text_field\n" \
+                   "TestModel object (pk={one})\nPatterns: fox\nThe quick brown fox\n\n" \
+                   "TestModel object (pk={two})\nPatterns: fox, l[a]zy\nThe fox and the cat were not lazy\n\n" \
+                   "TestModel object (pk={three})\nPatterns: l[a]zy\nThe dog was not lazy\n\n"
+        self.assertEqual(out, expected.format(one=self.one.pk, two=self.two.pk, three=self.three.pk))
+        self.assertEqual(len(queries), 1)
+        self.assertIn('(?:fox)|(?:l[a]zy)', queries[0]['sql'])
+
+    def test_highlighting(self):
+        out, queries = self.grep('-e', 'fox', '-e', 'cat', 'tests.TestModel.text_field', '--max-total', '2')
+        self.assertIn("The \x1b[43m\x1b[30mfox\x1b[0m and the \x1b[43m\x1b[30mcat\x1b[0m were not lazy", out)
+
+    def test_patterns_file(self):
+        path = self.write_patterns_file('fox\n\nlazy\n')
+        out, queries = self.grep('tests.TestModel.text_field', '--patterns-file', path, '--format', 'jsonl')
+        records = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual([record['patterns'] for record in records], [['fox'], ['fox', 'lazy'], ['lazy']])
+
+    def test_patterns_file_and_regexp(self):
+        path = self.write_patterns_file('fox\n')
+        out, queries = self.grep('tests.TestModel.text_field', '--patterns-file', path, '-e', 'dog', '--pks-only',
+                                 '--no-color')
+        expected = "\n<class 'django_grepdb.tests.models.TestModel'> text_field\n{one}\n{two}\n{three}\n"
+        self.assertEqual(out, expected.format(one=self.one.pk, two=self.two.pk, three=self.three.pk))
+
+    def test_preset_patterns_file(self):
+        path = self.write_patterns_file('cat\n')
+        presets = {'audit': {'identifiers': ['tests.TestModel.text_field'], 'patterns_file': path}}
+        with override_settings(DJANGO_GREPDB_PRESETS=presets):
+            out, queries = self.grep('-p', 'audit', '--count')
+        self.assertEqual(out, 'tests.testmodel text_field: 1\n')
+
+    def test_backreferences_are_not_combined(self):
+        with self.assertRaises(CommandError) as cm:
+            self.grep('-e', r'(a)\1', '-e', r'(b)\1', 'tests.TestModel.text_field')
+        self.assertEqual(cm.exception.message, 'Pattern "(a)\\1" refers back to a group, so it can\'t be combined '
+                                               'with other patterns: search for it on its own')
+        out, queries = self.grep('-e', r'(o)\1', 'tests.TestModel.text_field', '--count')
+        self.assertEqual(out, 'tests.testmodel text_field: 0\n')
+
+    def test_many_patterns(self):
+        args = []
+        for i in range(150):
+            args.extend(['-e', 'fox{i}'.format(i=i)])
+        out, queries = self.grep('-e', 'lazy', 'tests.TestModel.text_field', '--count', *args)
+        self.assertEqual(out, 'tests.testmodel text_field: 2\n')
+
+    @skipUnless(MAX_GROUPS, "Python 3's re module has no limit on groups")
+    def test_too_many_groups(self):
+        with self.assertRaises(CommandError) as cm:
+            self.grep('-e', '(a)' * 60, '-e', '(b)' * 40, 'tests.TestModel.text_field')
+        self.assertEqual(cm.exception.message, 'The patterns have 100 groups between them, but Python can only match '
+                                               '99 at once')
+        out, queries = self.grep('-e', '(a)' * 60, '-e', '(fox)' * 39, 'tests.TestModel.text_field', '--count')
+        self.assertEqual(out, 'tests.testmodel text_field: 0\n')
+
+    def test_plain_groups_for_other_databases(self):
+        command = Command()
+        command.patterns = ['fox', 'l[a]zy']
+        command.pattern = command.combine_patterns(command.patterns)
+        command.plain_group_pattern = command.combine_patterns(command.patterns, group=u'({pattern})')
+        self.assertEqual(command.get_database_pattern('postgresql'), '(?:fox)|(?:l[a]zy)')
+        self.assertEqual(command.get_database_pattern('mysql'), '(fox)|(l[a]zy)')
+
+    def test_no_pattern(self):
+        with self.assertRaises(CommandError) as cm:
+            self.grep()
+        self.assertEqual(cm.exception.message,
+                         'No pattern given: pass one as the first argument, or use -e or --patterns-file')
+
+    def test_missing_patterns_file(self):
+        path = os.path.join(self.directory, 'missing.txt')
+        with self.assertRaises(CommandError) as cm:
+            self.grep('tests.TestModel', '--patterns-file', path)
+        self.assertEqual(cm.exception.message,
+                         'Could not read patterns file {path}: No such file or directory'.format(path=path))
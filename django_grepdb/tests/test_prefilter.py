@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from ..patterns import get_required_literals, has_backreferences
+from models import TestModel
+
+
+class TestRequiredLiterals(SimpleTestCase):
+    def test_literal_pattern(self):
+        self.assertEqual(get_required_literals('brown fox'), (['brown fox'], True))
+
+    def test_escaped_punctuation_is_literal(self):
+        self.assertEqual(get_required_literals('mediocrem\\.'), (['mediocrem.'], True))
+
+    def test_literals_around_wildcards(self):
+        self.assertEqual(get_required_literals('{% custom_template_tag.*%}'), (['{% custom_template_tag'], False))
+        self.assertEqual(get_required_literals('The.+ fox'), (['The', ' fox'], False))
+
+    def test_optional_characters_are_not_required(self):
+        self.assertEqual(get_required_literals('colou?rful'), (['colo', 'rful'], False))
+        self.assertEqual(get_required_literals('abc{0,2}def'), (['def'], False))
+        self.assertEqual(get_required_literals('abcd{2}ef'), (['abcd'], False))
+
+    def test_short_literals_are_ignored(self):
+        self.assertEqual(get_required_literals('ab.cd'), ([], False))
+
+    def test_groups_and_classes_are_not_literal(self):
+        self.assertEqual(get_required_literals('(abc)def'), (['def'], False))
+        self.assertEqual(get_required_literals('x(a|b)yzw'), (['yzw'], False))
+        self.assertEqual(get_required_literals('[]abc]def'), (['def'], False))
+        self.assertEqual(get_required_literals('[[:alpha:]]xyz'), (['xyz'], False))
+        self.assertEqual(get_required_literals('\\dxyz\\w'), (['xyz'], False))
+
+    def test_nothing_required(self):
+        self.assertEqual(get_required_literals('fox|dog'), ([], False))
+        self.assertEqual(get_required_literals('(?i)fox'), ([], False))
+        self.assertEqual(get_required_literals(''), ([], False))
+
+    def test_backreferences(self):
+        self.assertTrue(has_backreferences(r'(a)\1'))
+        self.assertTrue(has_backreferences(r'(?P<word>\w+) (?P=word)'))
+        self.assertFalse(has_backreferences(r'a\\1'))
+        self.assertFalse(has_backreferences(r'[\1]x\0'))
+
+
+class TestPrefilter(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TestModel.objects.create(text_field="The quick brown fox")
+        TestModel.objects.create(text_field="The fox and the cat were not lazy")
+        TestModel.objects.create(text_field="The CAT was not lazy")
+
+    def search(self, pattern, *args):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('grepdb', pattern, 'tests.TestModel.text_field', '-s', *args, stdout=out)
+        return out.getvalue(), queries[0]['sql']
+
+    def test_required_literal_filters_before_regex(self):
+        out, sql = self.search('quick.* fox')
+        self.assertIn('LIKE', sql)
+        self.assertIn('REGEXP', sql)
+        self.assertIn('TestModel object (pk=1)', out)
+        self.assertNotIn('TestModel object (pk=2)', out)
+
+    def test_literal_pattern_case_insensitive_skips_regex(self):
+        out, sql = self.search('CAT', '-i')
+        self.assertIn('LIKE', sql)
+        self.assertNotIn('REGEXP', sql)
+        self.assertIn('TestModel object (pk=2)', out)
+        self.assertIn('TestModel object (pk=3)', out)
+
+    def test_literal_pattern_keeps_regex_for_case_on_sqlite(self):
+        out, sql = self.search('CAT')
+        self.assertIn('REGEXP', sql)
+        self.assertNotIn('TestModel object (pk=2)', out)
+        self.assertIn('TestModel object (pk=3)', out)
+
+    def test_no_prefilter(self):
+        out, sql = self.search('quick.* fox', '--no-prefilter')
+        self.assertNotIn('LIKE', sql)
+        self.assertIn('TestModel object (pk=1)', out)
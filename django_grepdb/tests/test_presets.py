@@ -103,6 +103,35 @@ class TestPresets(TestCase):
                    "\x1b[1m\x1b[32mTestModel object (pk=1)\x1b[0m\n"
         self.assertEqual(out.getvalue(), expected)
 
+    def test_command_line_overrides_preset_with_patterns(self):
+        out = StringIO()
+        call_command('grepdb', '-e', 'dog', 'tests.TestModel', '-s', '-p', 'both_models', '--no-color', stdout=out)
+        self.assertEqual(out.getvalue(), "\n<class 'django_grepdb.tests.models.TestModel'> text_field_two\n"
+                                         "TestModel object (pk=1)\n")
+        out = StringIO()
+        call_command('grepdb', '-e', 'dog', '-s', '-p', 'both_models', '--no-color', stdout=out)
+        self.assertEqual(out.getvalue(), "\n<class 'django_grepdb.tests.models.TestModelTwo'> text_field\n"
+                                         "TestModelTwo object (pk=1)\n"
+                                         "\n<class 'django_grepdb.tests.models.TestModel'> text_field_two\n"
+                                         "TestModel object (pk=1)\n")
+
+    def test_command_line_adds_identifiers_to_preset_with_patterns(self):
+        out = StringIO()
+        call_command('grepdb', '-e', 'fox', 'tests.TestModel', 'tests.TestModelTwo.char_field', '-p', 'model_one',
+                     '--count', stdout=out)
+        self.assertEqual(out.getvalue(), 'tests.testmodel text_field: 1\ntests.testmodel text_field_two: 0\n'
+                                         'tests.testmodeltwo char_field: 1\n')
+
+    def test_preset_in_short_option_cluster(self):
+        out = StringIO()
+        call_command('grepdb', 'BROWN', '-ip', 'model_one', '--count', stdout=out)
+        self.assertEqual(out.getvalue(), 'tests.testmodel text_field: 2\ntests.testmodel text_field_two: 0\n')
+
+    def test_preset_given_as_keyword_option(self):
+        with self.assertRaises(CommandError) as cm:
+            call_command('grepdb', 'brown', preset='model_one')
+        self.assertEqual(cm.exception.message, 'Preset "model_one" could not be found in the arguments')
+
     def test_misconfigured_preset(self):
         with self.assertRaises(CommandError) as cm:
             call_command('grepdb', 'brown', '-p', 'preset_is_a_list')
@@ -115,3 +144,18 @@ class TestPresets(TestCase):
         msg = 'Preset "what_preset" not found in DJANGO_GREPDB_PRESETS. Available values are: ' \
               'model_two_multiple_fields, preset_is_a_list, model_one, model_one_case_insensitive, both_models'
         self.assertEqual(cm.exception.message, msg)
+
+    def test_preset_defaults_set_before_parsing(self):
+        from ..management.commands.grepdb import Command
+        command = Command()
+        command.raw_args = ['brown', '--preset', 'model_one_case_insensitive']
+        parser = command.create_parser('', 'grepdb')
+        self.assertEqual(parser.get_default('identifiers'), ['tests.TestModel'])
+        self.assertTrue(parser.get_default('ignore_case'))
+
+    def test_keyword_options_override_preset(self):
+        out = StringIO()
+        call_command('grepdb', 'brown', '-s', '-p', 'model_one_case_insensitive', ignore_case=False, no_color=True,
+                     stdout=out)
+        expected = "\n<class 'django_grepdb.tests.models.TestModel'> text_field\nTestModel object (pk=1)\n"
+        self.assertEqual(out.getvalue(), expected)
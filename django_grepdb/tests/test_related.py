@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+from django.core.management import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from ..management import call_command
+from ..related import get_str_relations
+from models import TestModel, TestModelWithRelatedStr, TestModelWithStr
+
+
+class TestRelated(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        parent = TestModelWithStr.objects.create(name="Parent")
+        cls.children = [TestModelWithRelatedStr.objects.create(parent=parent, text_field="The quick brown fox")
+                        for i in range(3)]
+
+    def grep(self, *args):
+        out, err = StringIO(), StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('grepdb', 'fox', 'tests.TestModelWithRelatedStr', '-s', '--no-color', *args, stdout=out,
+                         stderr=err)
+        return out.getvalue(), err.getvalue(), queries
+
+    def assert_titles(self, out):
+        for child in self.children:
+            self.assertIn('Parent child (pk={pk})'.format(pk=child.pk), out)
+
+    def test_str_relations(self):
+        self.assertEqual(get_str_relations(TestModelWithRelatedStr), (['parent'], []))
+        self.assertEqual(get_str_relations(TestModelWithStr), ([], []))
+
+    def test_str_relations_are_selected(self):
+        out, err, queries = self.grep()
+        self.assert_titles(out)
+        self.assertEqual(len(queries), 1)
+
+    def test_n_plus_one_warning(self):
+        out, err, queries = self.grep('--no-auto-related', '--stats')
+        self.assert_titles(out)
+        self.assertEqual(len(queries), 4)
+        self.assertIn('Warning: 3 of the SQL queries were run while showing the results', err)
+        out, err, queries = self.grep('--stats')
+        self.assertNotIn('Warning', err)
+
+    def test_select_related(self):
+        out, err, queries = self.grep('--no-auto-related', '--select-related', 'tests.TestModelWithRelatedStr.parent')
+        self.assert_titles(out)
+        self.assertEqual(len(queries), 1)
+
+    def test_prefetch_related(self):
+        # the python engine reads the rows to match before loading the objects which do
+        for args, expected_queries in [((), 2), (('--stream',), 2), (('--engine', 'python'), 3)]:
+            out, err, queries = self.grep('--no-auto-related', '--prefetch-related',
+                                          'tests.TestModelWithRelatedStr.parent', *args)
+            self.assert_titles(out)
+            self.assertEqual(len(queries), expected_queries)
+
+    @override_settings(DJANGO_GREPDB_PRESETS={'children': {
+        'identifiers': ['tests.TestModelWithRelatedStr'], 'select_related': ['tests.TestModelWithRelatedStr.parent'],
+        'auto_related': False,
+    }})
+    def test_preset(self):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('grepdb', 'fox', '-p', 'children', stdout=out)
+        self.assert_titles(out.getvalue())
+        self.assertEqual(len(queries), 1)
+        self.assertIn('INNER JOIN "tests_testmodelwithstr"', queries[0]['sql'])
+
+    @override_settings(DJANGO_GREPDB_STR_FIELDS={'tests.TestModelWithRelatedStr': []})
+    def test_str_fields(self):
+        out, err, queries = self.grep()
+        self.assert_titles(out)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"tests_testmodelwithrelatedstr"."parent_id"', queries[0]['sql'])
+
+    def test_only_used_for_str(self):
+        TestModel.objects.create(text_field="The quick brown fox")
+        out, err, queries = self.grep('--pks-only', '--select-related', 'tests.TestModelWithRelatedStr.parent')
+        self.assertNotIn('JOIN', queries[0]['sql'])
+
+    def test_invalid_option(self):
+        with self.assertRaises(CommandError) as cm:
+            self.grep('--select-related', 'tests.TestModelWithRelatedStr')
+        self.assertEqual(cm.exception.message,
+                         '--select-related takes app_label.Model.relation, not "tests.TestModelWithRelatedStr"')
@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
+import re
+
 from django.core.management import call_command, CommandError
 from django.test import TestCase
 from django.utils.six import StringIO
 
+from ..management.commands.grepdb import Command
 from models import TestModel
 
 
@@ -54,6 +57,14 @@ class TestShowValues(TestCase):
                    "his. \x1b[43m\x1b[30mFeugiat\x1b[0m meli\n\n"
         self.assertEqual(out.getvalue(), expected)
 
+    def test_show_surrounding_chars_at_start_of_content(self):
+        out = StringIO()
+        call_command('grepdb', 'ipsum', 'tests.TestModel', '-s10', stdout=out)
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mTestModel object (pk=1)\x1b[0m\n" \
+                   "Lorem \x1b[43m\x1b[30mipsum\x1b[0m dolor sit\n\n"
+        self.assertEqual(out.getvalue(), expected)
+
     def test_show_surrounding_chars_across_lines(self):
         out = StringIO()
         call_command('grepdb', 'mediocrem\.', 'tests.TestModel', '-s5', stdout=out)
@@ -74,7 +85,7 @@ class TestShowValues(TestCase):
         call_command('grepdb', 'molestie', 'tests.TestModel', '-s10', stdout=out)
         expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field\x1b[0m\n" \
                    "\x1b[1m\x1b[32mTestModel object (pk=3)\x1b[0m\n"\
-                   "\x1b[43m\x1b[30mmolestie\x1b[0m invidunt \x1b[43m\x1b[30mmolestie\x1b[0m usu cu.\n\n"
+                   "Cu usu \x1b[43m\x1b[30mmolestie\x1b[0m invidunt \x1b[43m\x1b[30mmolestie\x1b[0m usu cu.\n\n"
         self.assertEqual(out.getvalue(), expected)
 
     def test_show_surrounding_chars_with_overlapping_matches(self):
@@ -83,7 +94,7 @@ class TestShowValues(TestCase):
         call_command('grepdb', '.{5}molestie.{5}', 'tests.TestModel', '-s5', stdout=out)
         expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field\x1b[0m\n" \
                    "\x1b[1m\x1b[32mTestModel object (pk=3)\x1b[0m\n"\
-                   "\x1b[43m\x1b[30m usu molestie invi\x1b[0m\x1b[43m\x1b[30mdunt molestie usu \x1b[0mcu.\n\n"
+                   "Cu\x1b[43m\x1b[30m usu molestie invi\x1b[0m\x1b[43m\x1b[30mdunt molestie usu \x1b[0mcu.\n\n"
         self.assertEqual(out.getvalue(), expected)
 
     def test_default_format_on_single_line_content_case_insensitive(self):
@@ -113,3 +124,88 @@ class TestShowValues(TestCase):
                    "\x1b[1m\x1b[32mTestModel object (pk=1)\x1b[0m\n" \
                    "giat \x1b[43m\x1b[30mmeliore\x1b[0m vix\n\n"
         self.assertEqual(out.getvalue(), expected)
+
+
+class TestShowValuesLineMode(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TestModel.objects.create(text_field="fox one\r\nno match\r\ntwo fox fox\r\n")
+        TestModel.objects.create(text_field="the end\nof the\nfox")
+
+    def test_matching_lines_from_multiple_lines(self):
+        out = StringIO()
+        call_command('grepdb', 'fox', 'tests.TestModel.text_field', stdout=out)
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mTestModel object (pk=1)\x1b[0m\n" \
+                   "\x1b[43m\x1b[30mfox\x1b[0m one\n\n" \
+                   "two \x1b[43m\x1b[30mfox\x1b[0m \x1b[43m\x1b[30mfox\x1b[0m\n\n" \
+                   "\x1b[1m\x1b[32mTestModel object (pk=2)\x1b[0m\n" \
+                   "\x1b[43m\x1b[30mfox\x1b[0m\n\n"
+        self.assertEqual(out.getvalue(), expected)
+
+    def test_anchors_match_at_line_boundaries(self):
+        out = StringIO()
+        call_command('grepdb', '^the|the$', 'tests.TestModel.text_field', stdout=out)
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mTestModel object (pk=2)\x1b[0m\n" \
+                   "\x1b[43m\x1b[30mthe\x1b[0m end\n\n" \
+                   "of \x1b[43m\x1b[30mthe\x1b[0m\n\n"
+        self.assertEqual(out.getvalue(), expected)
+
+    def test_matches_across_lines_are_not_shown(self):
+        out = StringIO()
+        call_command('grepdb', 'end\\sof', 'tests.TestModel.text_field', stdout=out)
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mTestModel object (pk=2)\x1b[0m\n\n"
+        self.assertEqual(out.getvalue(), expected)
+
+
+class TestShowValuesGreedyLines(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TestModel.objects.create(text_field="{% if b\nthe fox   \n%}x")
+
+    def grep(self, pattern):
+        out = StringIO()
+        call_command('grepdb', pattern, 'tests.TestModel.text_field', stdout=out)
+        return out.getvalue()
+
+    def test_greedy_matches_are_limited_to_the_line(self):
+        """Matches which would run on past the end of the line are shown as they match within it"""
+        header = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field\x1b[0m\n" \
+                 "\x1b[1m\x1b[32mTestModel object (pk=1)\x1b[0m\n"
+        self.assertEqual(self.grep('fox\\s*'), header + "the \x1b[43m\x1b[30mfox   \x1b[0m\n\n")
+        self.assertEqual(self.grep('b[^x]*'), header + "{% if \x1b[43m\x1b[30mb\x1b[0m\n\n")
+        self.assertEqual(self.grep('{%[^%]*'), header + "\x1b[43m\x1b[30m{% if b\x1b[0m\n\n")
+        self.assertEqual(self.grep('[bx][^b]*'), header + "{% if \x1b[43m\x1b[30mb\x1b[0m\n\n"
+                                                          "the fo\x1b[43m\x1b[30mx   \x1b[0m\n\n"
+                                                          "%}\x1b[43m\x1b[30mx\x1b[0m\n\n")
+
+
+class TestShowValuesSurroundingWindows(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TestModel.objects.create(text_field="Lorem ipsum AA")
+        TestModel.objects.create(text_field=" ab" * 5000)
+
+    def test_adjacent_matches_at_end_of_text(self):
+        """Merging the windows of matches shouldn't cut into the highlighting of the previous match"""
+        out = StringIO()
+        call_command('grepdb', 'A', 'tests.TestModel', '-s3', stdout=out)
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field\x1b[0m\n" \
+                   "\x1b[1m\x1b[32mTestModel object (pk=1)\x1b[0m\n" \
+                   "um \x1b[43m\x1b[30mA\x1b[0m\x1b[43m\x1b[30mA\x1b[0m\n\n"
+        self.assertEqual(out.getvalue(), expected)
+
+    def test_many_matches(self):
+        out = StringIO()
+        call_command('grepdb', 'b', 'tests.TestModel', '-s1', stdout=out)
+        self.assertEqual(out.getvalue().count("\x1b[43m\x1b[30mb\x1b[0m"), 5000)
+        self.assertTrue(out.getvalue().endswith("a\x1b[43m\x1b[30mb\x1b[0m\n\n"))
+
+    def test_touching_windows_are_merged(self):
+        command = Command()
+        command.regex = re.compile('b')
+        # the windows of matches 2 * chars apart touch, so are merged, and one character further apart they aren't
+        self.assertEqual(list(command.get_match_windows('ab..ba', 1)), [[0, 6, [(1, 2), (4, 5)]]])
+        self.assertEqual(list(command.get_match_windows('ab...ba', 1)), [[0, 3, [(1, 2)]], [4, 7, [(5, 6)]]])
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import CommandError
+from django.test import TestCase, override_settings
+from django.utils.six import StringIO
+
+from ..management import call_command
+from models import TestModel, TestModelWithStr
+
+
+class TestSince(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.state_file = os.path.join(self.directory, 'state.json')
+        settings = override_settings(
+            DJANGO_GREPDB_STATE_FILE=self.state_file,
+            DJANGO_GREPDB_PRESETS={
+                'models': {'identifiers': ['tests.TestModel.text_field']},
+                'models_with_str': {'identifiers': ['tests.TestModelWithStr.text_field'], 'since_field': 'updated_at'},
+            },
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def grep(self, *args):
+        out = StringIO()
+        call_command('grepdb', 'fox', *(args + ('--since',)), stdout=out)
+        return out.getvalue()
+
+    def test_only_new_rows_are_searched(self):
+        first = TestModel.objects.create(text_field="The quick brown fox")
+        self.assertIn('(pk={pk})'.format(pk=first.pk), self.grep('tests.TestModel.text_field'))
+        self.assertEqual(self.grep('tests.TestModel.text_field'), '')
+        second = TestModel.objects.create(text_field="The fox and the cat")
+        out = self.grep('tests.TestModel.text_field')
+        self.assertNotIn('(pk={pk})'.format(pk=first.pk), out)
+        self.assertIn('(pk={pk})'.format(pk=second.pk), out)
+
+    def test_watermarks_are_stored(self):
+        obj = TestModel.objects.create(text_field="The quick brown fox")
+        TestModel.objects.create(text_field="Nothing to see here")
+        self.grep('tests.TestModel.text_field')
+        with open(self.state_file) as f:
+            watermarks = json.load(f)
+        self.assertEqual(list(watermarks.values()), [obj.pk + 1])
+        self.assertRegexpMatches(list(watermarks)[0], r'^:[0-9a-f]{12}:default:tests\.testmodel:pk$')
+
+    def test_presets_have_their_own_watermarks(self):
+        obj = TestModel.objects.create(text_field="The quick brown fox")
+        self.grep('-p', 'models')
+        self.assertIn('(pk={pk})'.format(pk=obj.pk), self.grep('tests.TestModel.text_field'))
+        self.assertEqual(self.grep('-p', 'models'), '')
+
+    def test_searches_have_their_own_watermarks(self):
+        obj = TestModel.objects.create(text_field="The quick brown fox")
+        self.grep('tests.TestModel.text_field')
+        self.assertEqual(self.grep('tests.TestModel.text_field'), '')
+        for args in [('tests.TestModel.text_field', '-i'), ('tests.TestModel',)]:
+            self.assertIn('(pk={pk})'.format(pk=obj.pk), self.grep(*args))
+        out = StringIO()
+        call_command('grepdb', 'quick', 'tests.TestModel.text_field', '--since', stdout=out)
+        self.assertIn('(pk={pk})'.format(pk=obj.pk), out.getvalue())
+
+    def test_state_file_is_required(self):
+        with override_settings(DJANGO_GREPDB_STATE_FILE=None):
+            with self.assertRaises(CommandError) as cm:
+                self.grep('tests.TestModel.text_field')
+        self.assertEqual(cm.exception.message, '--since needs DJANGO_GREPDB_STATE_FILE to be set to the path of a file '
+                                               'to store the watermarks in')
+
+    def test_changed_rows_are_searched_with_since_field(self):
+        obj = TestModelWithStr.objects.create(name="Fox", text_field="The quick brown fox")
+        self.assertIn('Fox', self.grep('-p', 'models_with_str'))
+        self.assertEqual(self.grep('-p', 'models_with_str'), '')
+        # an older row which has been changed since
+        obj.name = "Changed fox"
+        obj.save()
+        self.assertIn('Changed fox', self.grep('-p', 'models_with_str'))
+
+    def test_unknown_since_field(self):
+        with self.assertRaises(CommandError) as cm:
+            self.grep('tests.TestModel.text_field', '--since-field', 'updated_at')
+        self.assertEqual(cm.exception.message, 'tests.testmodel has no field named "updated_at" to use with --since')
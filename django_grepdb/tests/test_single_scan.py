@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from models import TestModel
+
+
+class TestSingleScan(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TestModel.objects.create(text_field="The quick brown fox",
+                                 text_field_two="jumped over the lazy brown dog")
+        TestModel.objects.create(text_field="The fox and the cat were not lazy")
+        TestModel.objects.create(text_field_two="The CAT was not lazy")
+
+    def test_output_is_grouped_by_field(self):
+        out = StringIO()
+        call_command('grepdb', 'brown', 'tests.TestModel', '-s', '--single-scan', stdout=out)
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field\x1b[0m\n\x1b[1m\x1b" \
+                   "[32mTestModel object (pk=1)\x1b[0m\n\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models." \
+                   "TestModel'> text_field_two\x1b[0m\n\x1b[1m\x1b[32mTestModel object (pk=1)\x1b[0m\n"
+        self.assertEqual(out.getvalue(), expected)
+
+    def test_output_matches_query_per_field(self):
+        for args in [('lazy', '-s'), ('cat', '-s', '-i'), ('lazy', '-sa'), ('o', '-s2')]:
+            out, single_scan_out = StringIO(), StringIO()
+            call_command('grepdb', args[0], 'tests.TestModel', *args[1:], stdout=out)
+            call_command('grepdb', args[0], 'tests.TestModel', '--single-scan', *args[1:], stdout=single_scan_out)
+            self.assertEqual(out.getvalue(), single_scan_out.getvalue())
+
+    def test_fields_without_matches_are_omitted(self):
+        out = StringIO()
+        call_command('grepdb', 'fox', 'tests.TestModel', '-s', '--single-scan', stdout=out)
+        expected = "\x1b[1m\x1b[36m\n<class 'django_grepdb.tests.models.TestModel'> text_field\x1b[0m\n\x1b" \
+                   "[1m\x1b[32mTestModel object (pk=1)\x1b[0m\n\x1b[1m\x1b[32mTestModel object (pk=2)\x1b[0m\n"
+        self.assertEqual(out.getvalue(), expected)
+
+    def test_one_query_per_model(self):
+        with CaptureQueriesContext(connection) as queries:
+            call_command('grepdb', 'lazy', 'tests.TestModel', '-s', '--single-scan', stdout=StringIO())
+        self.assertEqual(len(queries), 1)
+
+    def test_no_fields_to_search(self):
+        out = StringIO()
+        call_command('grepdb', 'lazy', 'tests.TestModel', '-f', 'DateField', '--single-scan', stdout=out)
+        self.assertEqual(out.getvalue(), "")
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import json
+import re
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils.six import StringIO
+
+from .. import sqlite
+from ..signals import query_finished, search_finished
+from models import TestModel
+
+
+class TestRegexp(SimpleTestCase):
+    def setUp(self):
+        sqlite._regexes.clear()
+
+    def test_match(self):
+        self.assertTrue(sqlite.regexp(u'br.wn', u'The quick brown fox'))
+        self.assertFalse(sqlite.regexp(u'br.wn', u'The quick red fox'))
+        self.assertTrue(sqlite.regexp(u'(?i)BROWN', u'The quick brown fox'))
+
+    def test_null_and_non_text_values(self):
+        self.assertFalse(sqlite.regexp(u'.*', None))
+        self.assertTrue(sqlite.regexp(u'^12$', 12))
+
+    def test_compiled_patterns_are_cached(self):
+        sqlite.regexp(u'fox', u'The quick brown fox')
+        regex = sqlite._regexes[u'fox']
+        sqlite.regexp(u'fox', u'The quick red fox')
+        self.assertIs(sqlite._regexes[u'fox'], regex)
+
+    def test_cache_size_is_limited(self):
+        for i in range(sqlite.REGEX_CACHE_SIZE + 1):
+            sqlite.regexp(re.escape(str(i)), u'1')
+        self.assertLessEqual(len(sqlite._regexes), sqlite.REGEX_CACHE_SIZE)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite specific')
+class TestSqliteSearch(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TestModel.objects.create(text_field="The quick brown fox")
+        TestModel.objects.create(text_field="The CAT was not lazy")
+
+    def setUp(self):
+        sqlite._regexes.clear()
+
+    def test_cached_regexp_used_for_searches(self):
+        out = StringIO()
+        call_command('grepdb', 'qu.ck', 'tests.TestModel.text_field', '-s', stdout=out)
+        self.assertIn(u'qu.ck', sqlite._regexes)
+        self.assertIn('TestModel object (pk=1)', out.getvalue())
+
+    def test_case_insensitive_search(self):
+        out = StringIO()
+        call_command('grepdb', 'c.t', 'tests.TestModel.text_field', '-s', '-i', stdout=out)
+        self.assertIn(u'(?i)c.t', sqlite._regexes)
+        self.assertIn('TestModel object (pk=2)', out.getvalue())
+
+
+class TestStats(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TestModel.objects.create(text_field="The quick brown fox", text_field_two="The lazy brown dog")
+        TestModel.objects.create(text_field="The brown cat")
+
+    def test_stats_per_query(self):
+        out, err = StringIO(), StringIO()
+        call_command('grepdb', 'brown', 'tests.TestModel', '-s', '--stats', stdout=out, stderr=err)
+        self.assertRegexpMatches(err.getvalue(), r'^tests\.testmodel text_field: 2 rows in \d+\.\d{3}s '
+                                                 r'\(\d+\.\d{3}s CPU\), \d+ characters of text, 1 SQL queries\n'
+                                                 r'tests\.testmodel text_field_two: 1 rows in \d+\.\d{3}s '
+                                                 r'\(\d+\.\d{3}s CPU\), \d+ characters of text, 1 SQL queries\n'
+                                                 r'Phases: fetch \d+\.\d{3}s \(\d+\.\d{3}s CPU\), .*\n$')
+
+    def test_stats_single_scan(self):
+        out, err = StringIO(), StringIO()
+        call_command('grepdb', 'cat', 'tests.TestModel', '-s', '--stats', '--single-scan', stdout=out, stderr=err)
+        self.assertRegexpMatches(err.getvalue(),
+                                 r'^tests\.testmodel text_field, text_field_two: 1 rows in \d+\.\d{3}s '
+                                 r'\(\d+\.\d{3}s CPU\), \d+ characters of text, 1 SQL queries\nPhases: ')
+
+    def test_stats_count(self):
+        out, err = StringIO(), StringIO()
+        call_command('grepdb', 'brown', 'tests.TestModel', '--count', '--stats', stdout=out, stderr=err)
+        self.assertRegexpMatches(err.getvalue(), r'^tests\.testmodel text_field: \d+\.\d{3}s \(\d+\.\d{3}s CPU\), '
+                                                 r'0 characters of text, 1 SQL queries\n')
+
+    def test_no_stats_by_default(self):
+        err = StringIO()
+        call_command('grepdb', 'brown', 'tests.TestModel', '-s', stdout=StringIO(), stderr=err)
+        self.assertEqual(err.getvalue(), '')
+
+    def test_stats_text_length(self):
+        for engine in ('database', 'python'):
+            err = StringIO()
+            call_command('grepdb', 'brown', 'tests.TestModel', '--stats', '--engine', engine, stdout=StringIO(),
+                         stderr=err)
+            lines = err.getvalue().splitlines()
+            self.assertIn(' 32 characters of text', lines[0])
+            self.assertIn(' 18 characters of text', lines[1])
+
+    def test_stats_sql(self):
+        err = StringIO()
+        call_command('grepdb', 'brown', 'tests.TestModel.text_field', '--stats', '--verbosity', '2',
+                     stdout=StringIO(), stderr=err)
+        lines = err.getvalue().splitlines()
+        self.assertRegexpMatches(lines[1], r'^    \d+\.\d{3}s .*SELECT .*"tests_testmodel"\."text_field" REGEXP')
+        self.assertTrue(lines[2].startswith('Phases: '))
+
+    def test_stats_structured_format(self):
+        err = StringIO()
+        call_command('grepdb', 'brown', 'tests.TestModel.text_field', '--stats', '--format', 'jsonl',
+                     stdout=StringIO(), stderr=err)
+        query, phases = [json.loads(line) for line in err.getvalue().splitlines()]
+        self.assertEqual(query['model'], 'tests.testmodel')
+        self.assertEqual(query['fields'], ['text_field'])
+        self.assertEqual((query['rows'], query['text_length'], len(query['sql'])), (2, 32, 1))
+        self.assertEqual(sorted(phases['phases']), ['fetch', 'highlight', 'links', 'title', 'write'])
+
+    def test_signals(self):
+        received = []
+
+        def query_receiver(sender, **kwargs):
+            received.append(('query', kwargs['query']['field_name'], kwargs['rows'], kwargs['text_length'],
+                             len(kwargs['sql'])))
+
+        def search_receiver(sender, **kwargs):
+            received.append(('search', len(kwargs['queries']), sorted(kwargs['phases'])))
+
+        query_finished.connect(query_receiver)
+        self.addCleanup(query_finished.disconnect, query_receiver)
+        search_finished.connect(search_receiver)
+        self.addCleanup(search_finished.disconnect, search_receiver)
+        err = StringIO()
+        call_command('grepdb', 'brown', 'tests.TestModel', '-s', stdout=StringIO(), stderr=err)
+        self.assertEqual(received, [
+            ('query', 'text_field', 2, 32, 1),
+            ('query', 'text_field_two', 1, 18, 1),
+            ('search', 2, ['fetch', 'highlight', 'links', 'title', 'write']),
+        ])
+        # the statistics are only written with --stats
+        self.assertEqual(err.getvalue(), '')
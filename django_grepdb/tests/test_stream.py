@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from models import TestModel
+
+
+class QueryCountingOutput(StringIO):
+    """Records how many queries had been run before each write"""
+    def __init__(self, queries):
+        StringIO.__init__(self)
+        self.queries = queries
+        self.queries_before_writes = []
+
+    def write(self, text):
+        self.queries_before_writes.append(len(self.queries))
+        StringIO.write(self, text)
+
+
+class TestStream(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            TestModel.objects.create(text_field="The quick brown fox {}".format(i), text_field_two="lazy dog")
+
+    def test_output_matches_default_mode(self):
+        for args in [('fox', '-s'), ('dog', '-sa'), ('cat', '-s')]:
+            out, stream_out = StringIO(), StringIO()
+            call_command('grepdb', args[0], 'tests.TestModel', *args[1:], stdout=out)
+            call_command('grepdb', args[0], 'tests.TestModel', '--stream', '--chunk-size', '2', *args[1:],
+                         stdout=stream_out)
+            self.assertEqual(out.getvalue(), stream_out.getvalue())
+
+    def test_single_scan_is_written_a_chunk_at_a_time(self):
+        with CaptureQueriesContext(connection) as queries:
+            out = QueryCountingOutput(queries)
+            call_command('grepdb', 'fox', 'tests.TestModel', '--single-scan', '--stream', '--chunk-size', '2',
+                         '--no-color', stdout=out)
+        # chunks of 2, 2 and 1 rows, with the first written before the second is fetched
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(out.queries_before_writes[0], 1)
+        self.assertEqual(out.getvalue().count("<class 'django_grepdb.tests.models.TestModel'> text_field\n"), 3)
+        self.assertEqual(out.getvalue().count("TestModel object"), 5)
+
+    def test_single_scan_max_count_is_for_all_chunks(self):
+        out = StringIO()
+        call_command('grepdb', 'fox', 'tests.TestModel', '--single-scan', '--stream', '--chunk-size', '2',
+                     '--max-count', '3', '--pks-only', '--no-color', stdout=out)
+        self.assertEqual(out.getvalue(), "\n<class 'django_grepdb.tests.models.TestModel'> text_field\n1\n2\n"
+                                         "\n<class 'django_grepdb.tests.models.TestModel'> text_field\n3\n")
+
+    def test_results_are_fetched_in_chunks(self):
+        with CaptureQueriesContext(connection) as queries:
+            call_command('grepdb', 'fox', 'tests.TestModel.text_field', '-s', '--stream', '--chunk-size', '2',
+                         stdout=StringIO())
+        # chunks of 2, 2 and 1 rows
+        self.assertEqual(len(queries), 3)
+
+    def test_exact_multiple_of_chunk_size(self):
+        with CaptureQueriesContext(connection) as queries:
+            call_command('grepdb', 'fox', 'tests.TestModel.text_field', '-s', '--stream', '--chunk-size', '5',
+                         stdout=StringIO())
+        # one full chunk, then an empty one to confirm there are no more
+        self.assertEqual(len(queries), 2)
+
+    def test_no_matches_needs_single_query(self):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('grepdb', 'cat', 'tests.TestModel.text_field', '-s', '--stream', stdout=out)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(out.getvalue(), "")
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(CommandError) as cm:
+            call_command('grepdb', 'fox', '--chunk-size', '0')
+        msg = "Error: argument --chunk-size: 0 is not a positive integer"
+        self.assertEqual(cm.exception.message, msg)
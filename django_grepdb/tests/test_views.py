@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.exceptions import PermissionDenied
+from django.core.urlresolvers import reverse
+from django.db import OperationalError, connection
+from django.test import RequestFactory, TestCase, override_settings
+
+from .. import views
+from ..timeouts import statement_timeout
+from models import TestModel, TestModelTwo
+
+
+class User(object):
+    is_active = True
+
+    def __init__(self, is_staff, perms):
+        self.is_staff = is_staff
+        self.perms = perms
+
+    def has_perm(self, perm):
+        return perm in self.perms
+
+
+@override_settings(
+    INSTALLED_APPS=[
+        'django.contrib.admin',
+        'django.contrib.auth',
+        'django.contrib.contenttypes',
+        'django_grepdb',
+        'django_grepdb.tests',
+    ],
+    ROOT_URLCONF='django_grepdb.tests.admin_urls'
+)
+class TestGrepView(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.one = TestModel.objects.create(text_field="The quick brown fox", text_field_two="The lazy brown dog")
+        cls.two = TestModel.objects.create(text_field="The brown cat")
+        cls.three = TestModelTwo.objects.create(text_field="A brown cow")
+
+    def get(self, is_staff=True, perms=('tests.change_testmodel', 'tests.change_testmodeltwo'), **params):
+        request = RequestFactory().get(reverse('grepdb'), params)
+        request.user = User(is_staff, perms)
+        return views.grep(request)
+
+    def get_page(self, **params):
+        response = self.get(format='json', **params)
+        self.assertEqual(response.status_code, 200)
+        page = json.loads(response.content.decode('utf-8'))
+        return [(match['model'], match['field'], match['pk']) for match in page['matches']], page['next']
+
+    def test_staff_only(self):
+        response = self.get(is_staff=False, pattern='brown', identifier='tests.TestModel')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/admin/login/', response['Location'])
+
+    def test_model_permissions(self):
+        with self.assertRaises(PermissionDenied):
+            self.get(perms=['tests.change_testmodel'], pattern='brown',
+                     identifier=['tests.TestModel', 'tests.TestModelTwo'])
+        with self.assertRaises(PermissionDenied):
+            self.get(perms=['tests.change_testmodel'], pattern='brown', identifier='contenttypes.ContentType.model')
+        matches, cursor = self.get_page(perms=['tests.change_testmodeltwo'], pattern='brown', all_models='1')
+        self.assertEqual(matches, [('tests.testmodeltwo', 'text_field', self.three.pk)])
+
+    def test_preset_options_are_overridden(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        state_file = os.path.join(directory, 'state.json')
+        presets = {'everywhere': {'identifiers': ['tests.TestModelTwo'], 'all_databases': True, 'jobs': 4,
+                                  'engine': 'python', 'since': True}}
+        with override_settings(DJANGO_GREPDB_PRESETS=presets, DJANGO_GREPDB_STATE_FILE=state_file):
+            matches, cursor = self.get_page(pattern='brown', preset='everywhere')
+        self.assertEqual(matches, [('tests.testmodeltwo', 'text_field', self.three.pk)])
+        self.assertFalse(os.path.exists(state_file))
+
+    def test_text(self):
+        response = self.get(pattern='c.w', identifier=['tests.TestModel', 'tests.TestModelTwo'])
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertEqual(b''.join(response.streaming_content).decode('utf-8'),
+                         u'tests.testmodeltwo text_field (pk={pk})\n/admin/tests/testmodeltwo/{pk}/\n'
+                         u'A brown cow\n\n'.format(pk=self.three.pk))
+
+    def test_jsonl(self):
+        response = self.get(pattern='BROWN', identifier='tests.TestModel.text_field', ignore_case='1', format='jsonl')
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode('utf-8').splitlines()]
+        self.assertEqual(records, [
+            {'model': 'tests.testmodel', 'field': 'text_field', 'pk': self.one.pk, 'database': 'default',
+             'admin_url': '/admin/tests/testmodel/{pk}/'.format(pk=self.one.pk), 'spans': [[10, 15]],
+             'snippet': 'The quick brown fox'},
+            {'model': 'tests.testmodel', 'field': 'text_field', 'pk': self.two.pk, 'database': 'default',
+             'admin_url': '/admin/tests/testmodel/{pk}/'.format(pk=self.two.pk), 'spans': [[4, 9]],
+             'snippet': 'The brown cat'},
+            {'next': None},
+        ])
+
+    def test_pages(self):
+        identifiers = ['tests.TestModel', 'tests.TestModelTwo']
+        matches, cursor = self.get_page(pattern='brown', identifier=identifiers, limit=2)
+        self.assertEqual(matches, [('tests.testmodel', 'text_field', self.one.pk),
+                                   ('tests.testmodel', 'text_field', self.two.pk)])
+        matches, cursor = self.get_page(pattern='brown', identifier=identifiers, limit=2, after=cursor)
+        self.assertEqual(matches, [('tests.testmodel', 'text_field_two', self.one.pk),
+                                   ('tests.testmodeltwo', 'text_field', self.three.pk)])
+        self.assertIsNone(cursor)
+
+    def test_multiple_patterns(self):
+        matches, cursor = self.get_page(pattern=['quick', 'cat'], identifier='tests.TestModel.text_field')
+        self.assertEqual(matches, [('tests.testmodel', 'text_field', self.one.pk),
+                                   ('tests.testmodel', 'text_field', self.two.pk)])
+
+    def test_single_scan_pages_end_after_whole_objects(self):
+        matches, cursor = self.get_page(pattern='brown', identifier='tests.TestModel', single_scan='1', limit=1)
+        self.assertEqual(matches, [('tests.testmodel', 'text_field', self.one.pk),
+                                   ('tests.testmodel', 'text_field_two', self.one.pk)])
+        self.assertEqual(cursor, '0:{pk}'.format(pk=self.one.pk))
+
+    @override_settings(DJANGO_GREPDB_VIEW_ROW_LIMIT=1)
+    def test_row_limit(self):
+        matches, cursor = self.get_page(pattern='brown', identifier='tests.TestModel', limit=100)
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(cursor, '0:{pk}'.format(pk=self.one.pk))
+
+    def test_time_limit(self):
+        with override_settings(DJANGO_GREPDB_VIEW_TIME_LIMIT=-1):
+            response = self.get(pattern='brown', identifier='tests.TestModel')
+            self.assertEqual(b''.join(response.streaming_content).decode('utf-8'),
+                             u'More matches may follow: continue with after=0:\n')
+        matches, cursor = self.get_page(pattern='brown', identifier='tests.TestModel', after='0:')
+        self.assertEqual(len(matches), 3)
+        self.assertIsNone(cursor)
+
+    def test_statement_timeout(self):
+        sql = 'WITH RECURSIVE numbers(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM numbers WHERE n < 100000) ' \
+              'SELECT count(*) FROM numbers'
+        with self.assertRaises(OperationalError):
+            with statement_timeout(connection, time.time() - 1):
+                TestModel.objects.create(text_field="Rolled back with the savepoint")
+                connection.cursor().execute(sql)
+        # only the savepoint was rolled back, so the test's transaction can still be used, without the timeout
+        self.assertFalse(TestModel.objects.filter(text_field="Rolled back with the savepoint").exists())
+        self.assertEqual(TestModel.objects.count(), 2)
+        with statement_timeout(connection, time.time() + 60):
+            cursor = connection.cursor()
+            cursor.execute(sql)
+            self.assertEqual(cursor.fetchone(), (100000,))
+        cursor.execute(sql)
+        self.assertEqual(cursor.fetchone(), (100000,))
+
+    def test_bad_requests(self):
+        response = self.get(identifier='tests.TestModel')
+        self.assertEqual((response.status_code, response.content), (400, b'No pattern given'))
+        self.assertEqual(self.get(pattern='brown', identifier='tests.NoSuchModel').status_code, 400)
+        response = self.get(pattern='brown', identifier='tests.TestModel', format='xml')
+        self.assertEqual((response.status_code, response.content), (400, b'Unknown format: xml'))
@@ -0,0 +1,14 @@
+from django.db import connections
+
+
+def threads_share_test_databases():
+    """Whether other threads, which open their own database connections, can see the test databases. They can't
+    when SQLite's in-memory databases can't be shared between connections, e.g. on Python 2, which is why the test
+    settings use files.
+    """
+    for alias in connections:
+        connection = connections[alias]
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db(connection.settings_dict['NAME']) and \
+                not connection.features.can_share_in_memory_db:
+            return False
+    return True
@@ -0,0 +1,65 @@
+import time
+from contextlib import contextmanager
+
+from django.db import DatabaseError, transaction
+
+# how many SQLite virtual machine instructions to run between checks of the deadline
+SQLITE_PROGRESS_INTERVAL = 1000
+
+
+@contextmanager
+def statement_timeout(connection, deadline):
+    """Stops statements run in the block once the deadline (a time.time()) has passed, so that they raise an
+    OperationalError instead. The block is run in a savepoint (or a transaction, outside of one): a statement stopped
+    by PostgreSQL aborts the transaction it's in, so this way only the savepoint is rolled back, along with the
+    timeout, and an outer transaction (e.g. ATOMIC_REQUESTS') can still be used.
+    """
+    with transaction.atomic(using=connection.alias):
+        set_statement_timeout(connection, deadline)
+        completed = False
+        try:
+            yield
+            completed = True
+        finally:
+            # SET LOCAL lasts until the end of the outer transaction, unless the savepoint is rolled back, which
+            # it is whenever the block doesn't complete. No statements can be run before that if one was stopped.
+            if completed or connection.vendor != 'postgresql':
+                reset_statement_timeout(connection)
+
+
+def set_statement_timeout(connection, deadline):
+    """Makes the database stop running a statement once the deadline has passed. Uses a progress handler on SQLite,
+    and the statement timeout on PostgreSQL (for the rest of the transaction) and MySQL 5.7.8+. Other databases
+    aren't limited.
+    """
+    if connection.vendor == 'sqlite':
+        connection.ensure_connection()
+        connection.connection.set_progress_handler(lambda: time.time() > deadline, SQLITE_PROGRESS_INTERVAL)
+        return
+    # rounded up, so that the deadline has passed when the statement is stopped
+    milliseconds = max(1, int((deadline - time.time()) * 1000) + 1)
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL statement_timeout = %s', [milliseconds])
+    elif connection.vendor == 'mysql':
+        set_mysql_execution_time(connection, milliseconds)
+
+
+def reset_statement_timeout(connection):
+    if connection.vendor == 'sqlite':
+        if connection.connection is not None:
+            connection.connection.set_progress_handler(None, 0)
+    elif connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL statement_timeout = DEFAULT')
+    elif connection.vendor == 'mysql':
+        set_mysql_execution_time(connection, 'DEFAULT')
+
+
+def set_mysql_execution_time(connection, value):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SET SESSION max_execution_time = {value}'.format(value=value))
+    except DatabaseError:
+        # not supported before MySQL 5.7.8, or by MariaDB
+        pass
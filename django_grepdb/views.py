@@ -0,0 +1,171 @@
+import json
+import time
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth import get_permission_codename
+from django.core.exceptions import PermissionDenied
+from django.core.management import CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.urlresolvers import NoReverseMatch, reverse
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.utils.http import RFC3986_SUBDELIMS, urlquote
+from django.views.decorators.http import require_GET
+
+from .api import SearchTimeout, search
+from .management.commands.grepdb import ADMIN_PK_PLACEHOLDER, get_model_label
+
+DEFAULT_ROW_LIMIT = 1000
+DEFAULT_TIME_LIMIT = 10
+
+# query string parameters which are passed on to search(), with the option each is for and whether it can be given
+# more than once
+SEARCH_PARAMETERS = {
+    'preset': ('preset', False),
+    'ignore_case': ('ignore_case', False),
+    'single_scan': ('single_scan', False),
+    'all_models': ('all_models', False),
+    'app': ('app_labels', True),
+    'exclude_app': ('exclude_app_labels', True),
+    'field_type': ('field_type', True),
+}
+BOOLEAN_OPTIONS = ('ignore_case', 'single_scan', 'all_models')
+
+
+@staff_member_required
+@require_GET
+def grep(request):
+    """Searches like the grepdb command, with the pattern (or patterns) and identifiers in the query string, along
+    with some of its options. Matches are streamed as text, or as JSON lines with format=jsonl, or returned as a page of JSON
+    with format=json. Either way, no more than DJANGO_GREPDB_VIEW_ROW_LIMIT matches are returned, and the search
+    stops once it has taken DJANGO_GREPDB_VIEW_TIME_LIMIT seconds, including any query still running where the
+    database allows. The cursor to continue from is given at the end.
+
+    Only models which the user has permission to change can be searched: naming any others gives a 403, and
+    all_models leaves them out.
+    """
+    limit = get_row_limit(request)
+    output_format = request.GET.get('format', 'text')
+    if output_format not in ('text', 'jsonl', 'json'):
+        return HttpResponseBadRequest(u'Unknown format: {format}'.format(format=output_format))
+    patterns = request.GET.getlist('pattern')
+    if not patterns:
+        return HttpResponseBadRequest(u'No pattern given')
+    options = get_search_options(request, limit)
+    allow_model = get_permission_check(request.user, options.get('all_models', False))
+    deadline = time.time() + getattr(settings, 'DJANGO_GREPDB_VIEW_TIME_LIMIT', DEFAULT_TIME_LIMIT)
+    try:
+        matches = search(None, request.GET.getlist('identifier'), patterns=patterns, after=request.GET.get('after'),
+                         allow_model=allow_model, deadline=deadline, **options)
+    except (CommandError, LookupError, ValueError) as e:
+        return HttpResponseBadRequest(u'{error}'.format(error=e))
+    records = get_records(matches, limit, deadline)
+    if output_format == 'json':
+        page = list(records)
+        return JsonResponse({'matches': page[:-1], 'next': page[-1]['next']}, encoder=DjangoJSONEncoder)
+    if output_format == 'jsonl':
+        lines = (json.dumps(record, cls=DjangoJSONEncoder) + '\n' for record in records)
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+    return StreamingHttpResponse((format_text(record) for record in records), content_type='text/plain')
+
+
+def get_row_limit(request):
+    row_limit = getattr(settings, 'DJANGO_GREPDB_VIEW_ROW_LIMIT', DEFAULT_ROW_LIMIT)
+    try:
+        return max(1, min(int(request.GET.get('limit', row_limit)), row_limit))
+    except ValueError:
+        return row_limit
+
+
+def get_search_options(request, limit):
+    """Returns the options for the search from the query string. Rows are always fetched in chunks, in primary
+    key order, so that a web worker never loads an unbounded number of them. These override any preset, as do
+    options which would load results in threads, fork processes or write the --since state file.
+    """
+    options = {'stream': True, 'chunk_size': limit, 'admin_hostname': [], 'jobs': 1, 'engine': 'database',
+               'since': False}
+    for parameter, (name, many) in SEARCH_PARAMETERS.items():
+        if parameter in request.GET:
+            options[name] = request.GET.getlist(parameter) if many else request.GET[parameter]
+    for name in BOOLEAN_OPTIONS:
+        if name in options:
+            options[name] = options[name] not in ('', '0', 'false')
+    return options
+
+
+def get_permission_check(user, all_models):
+    """Returns a function checking that the user has permission to change a model before it is searched. Models
+    the user doesn't have permission for are skipped when searching all models, and otherwise refused.
+    """
+    def allow_model(model):
+        opts = model._meta
+        perm = u'{app_label}.{codename}'.format(app_label=opts.app_label,
+                                                codename=get_permission_codename('change', opts))
+        if user.has_perm(perm):
+            return True
+        if all_models:
+            return False
+        raise PermissionDenied
+    return allow_model
+
+
+def get_records(matches, limit, deadline):
+    """Yields a record for each match, up to the limit or until the deadline, followed by the cursor to continue
+    from (if there may be more matches). The matches for the last object are always all given, so that the cursor
+    doesn't skip any of its other fields.
+    """
+    admin_urls = {}
+    count = 0
+    last = None
+    try:
+        for match in matches:
+            if last is not None and match.cursor != last.cursor and (count >= limit or time.time() > deadline):
+                yield {'next': last.cursor}
+                return
+            yield {
+                'model': get_model_label(match.model),
+                'field': match.field,
+                'pk': match.pk,
+                'database': match.database,
+                'admin_url': get_admin_url(admin_urls, match),
+                'spans': match.spans,
+                'snippet': match.snippet(),
+            }
+            count += 1
+            last = match
+    except SearchTimeout as e:
+        yield {'next': e.cursor}
+        return
+    finally:
+        # stops the search, so that the savepoint of the query it's in is closed straight away
+        matches.close()
+    yield {'next': None}
+
+
+def get_admin_url(admin_urls, match):
+    """Returns the admin change URL for the match, or None if its model isn't registered with the admin. As in the
+    command, the URL is only reversed once for each model, with a placeholder in place of the primary key.
+    """
+    opts = match.model._meta.concrete_model._meta
+    if opts not in admin_urls:
+        admin_url_pattern = 'admin:{app}_{model}_change'.format(app=opts.app_label, model=opts.model_name)
+        try:
+            admin_urls[opts] = reverse(admin_url_pattern, args=[ADMIN_PK_PLACEHOLDER]).split(ADMIN_PK_PLACEHOLDER)
+        except NoReverseMatch:
+            admin_urls[opts] = None
+    if admin_urls[opts] is None:
+        return None
+    prefix, suffix = admin_urls[opts]
+    return prefix + urlquote(match.pk, safe=RFC3986_SUBDELIMS + '/~:@') + suffix
+
+
+def format_text(record):
+    if 'next' in record:
+        if record['next'] is None:
+            return u''
+        return u'More matches may follow: continue with after={next}\n'.format(next=record['next'])
+    lines = [u'{model} {field} (pk={pk})'.format(**record)]
+    if record['admin_url']:
+        lines.append(record['admin_url'])
+    lines.append(record['snippet'])
+    return u'\n'.join(lines) + u'\n\n'
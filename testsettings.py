@@ -1,13 +1,24 @@
+import os
+import tempfile
+
+# the test databases are files, so that the threads of --jobs, which open their own connections, can see them
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': ':memory:',
+        'NAME': os.path.join(tempfile.gettempdir(), 'django_grepdb_default.sqlite3'),
+        'TEST': {'NAME': os.path.join(tempfile.gettempdir(), 'django_grepdb_test_default.sqlite3')},
+    },
+    'other': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(tempfile.gettempdir(), 'django_grepdb_other.sqlite3'),
+        'TEST': {'NAME': os.path.join(tempfile.gettempdir(), 'django_grepdb_test_other.sqlite3')},
     },
 }
 
 INSTALLED_APPS = (
     'django.contrib.contenttypes',
     'django_grepdb',
+    'django_grepdb.index',
     'django_grepdb.tests',
 )
 